@@ -11,6 +11,9 @@ Page({
     records: [],
     loading: true,
     isEmpty: false,
+    // 分页
+    nextCursor: null,
+    loadingMore: false,
     // 是否已加载过
     hasLoaded: false
   },
@@ -53,7 +56,21 @@ Page({
     }
   },
 
-  // 加载抽取记录
+  // 处理图片URL并格式化时间
+  formatRecords(records) {
+    return records.map(item => {
+      if (item.food && item.food.image_url && !item.food.image_url.startsWith('http')) {
+        item.food.image_url = BASE_URL + item.food.image_url;
+      }
+      // 格式化时间
+      if (item.drawn_at) {
+        item.formattedTime = this.formatTime(item.drawn_at);
+      }
+      return item;
+    });
+  },
+
+  // 加载抽取记录（第一页）
   async loadRecords() {
     this.setData({ loading: true });
     
@@ -61,7 +78,7 @@ Page({
       const res = await drawApi.getRecords();
       console.log('抽取记录响应:', res);
       
-      // 后端返回格式：{code: 0, data: {records: [...]}}
+      // 后端返回格式：{code: 0, data: {records: [...], next_cursor: "..."}}
       if (res && res.code === 0 && res.data) {
         // 获取 records 数组，兼容两种格式
         let records = res.data.records || res.data;
@@ -71,20 +88,11 @@ Page({
           records = [];
         }
         
-        // 处理图片URL并格式化时间
-        records = records.map(item => {
-          if (item.food && item.food.image_url && !item.food.image_url.startsWith('http')) {
-            item.food.image_url = BASE_URL + item.food.image_url;
-          }
-          // 格式化时间
-          if (item.drawn_at) {
-            item.formattedTime = this.formatTime(item.drawn_at);
-          }
-          return item;
-        });
+        records = this.formatRecords(records);
         
         this.setData({
           records: records,
+          nextCursor: res.data.next_cursor || null,
           loading: false,
           isEmpty: records.length === 0,
           hasLoaded: true
@@ -92,6 +100,7 @@ Page({
       } else {
         this.setData({
           records: [],
+          nextCursor: null,
           loading: false,
           isEmpty: true,
           hasLoaded: true
@@ -101,6 +110,7 @@ Page({
       console.error('获取抽取记录失败', e);
       this.setData({
         records: [],
+        nextCursor: null,
         loading: false,
         isEmpty: true,
         hasLoaded: true
@@ -108,6 +118,33 @@ Page({
     }
   },
 
+  // 滚动到底部时加载下一页
+  async loadMoreRecords() {
+    const { nextCursor, loadingMore } = this.data;
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+
+    this.setData({ loadingMore: true });
+
+    try {
+      const res = await drawApi.getRecords(nextCursor);
+      if (res && res.code === 0 && res.data && Array.isArray(res.data.records)) {
+        const records = this.formatRecords(res.data.records);
+        this.setData({
+          records: this.data.records.concat(records),
+          nextCursor: res.data.next_cursor || null,
+          loadingMore: false
+        });
+      } else {
+        this.setData({ loadingMore: false });
+      }
+    } catch (e) {
+      console.error('加载更多抽取记录失败', e);
+      this.setData({ loadingMore: false });
+    }
+  },
+
   // 格式化时间
   formatTime(timeStr) {
     const date = new Date(timeStr);
@@ -71,7 +71,8 @@ Page({
   // 加载用户信息
   async loadUserInfo() {
     try {
-      const res = await userApi.getUserInfo();
+      // 头像以 80rpx 圆形展示，128px 缩略图足够清晰
+      const res = await userApi.getUserInfo(128);
       
       // 后端返回格式：{code: 0, data: {id, username, nickname, avatar_url, openid, created_at, today_remaining_times}}
       if (res && res.code === 0 && res.data) {
@@ -82,10 +82,12 @@ const userApi = {
   },
 
   // 获取用户信息
-  getUserInfo: () => {
+  // avatarSize: 头像展示尺寸（像素），传入时返回对应尺寸的缩略图地址
+  getUserInfo: (avatarSize) => {
     return request({
       url: '/api/user/info',
-      method: 'GET'
+      method: 'GET',
+      data: avatarSize ? { avatar_size: avatarSize } : {}
     });
   },
 
@@ -164,12 +166,15 @@ const userApi = {
 const drawApi = {
   // 抽取美食
   // meal_type: 1=早餐, 2=午餐, 3=晚餐, 4=夜宵
+  // distractors: 额外返回的陪衬美食数量（名称 + 图片），可用于动画预加载图片
   draw: (params = {}) => {
     const queryParams = [];
     if (params.meal_type) queryParams.push(`meal_type=${params.meal_type}`);
     if (params.min_price !== undefined) queryParams.push(`min_price=${params.min_price}`);
     if (params.max_price !== undefined) queryParams.push(`max_price=${params.max_price}`);
     if (params.category) queryParams.push(`category=${encodeURIComponent(params.category)}`);
+    // 陪衬美食数量，用于抽取动画
+    if (params.distractors) queryParams.push(`distractors=${params.distractors}`);
     
     const queryString = queryParams.length > 0 ? '?' + queryParams.join('&') : '';
     
@@ -179,15 +184,145 @@ const drawApi = {
     });
   },
 
-  // 获取抽取记录
-  getRecords: () => {
+  // 批量抽取美食（每道美食消耗一次抽取次数）
+  // n: 抽取数量，其余参数同 draw
+  drawBatch: (n, params = {}) => {
+    const queryParams = [`n=${n}`];
+    if (params.meal_type) queryParams.push(`meal_type=${params.meal_type}`);
+    if (params.min_price !== undefined) queryParams.push(`min_price=${params.min_price}`);
+    if (params.max_price !== undefined) queryParams.push(`max_price=${params.max_price}`);
+    if (params.category) queryParams.push(`category=${encodeURIComponent(params.category)}`);
+
     return request({
-      url: '/api/draw/records',
+      url: '/api/draw/batch?' + queryParams.join('&'),
+      method: 'POST'
+    });
+  },
+
+  // 获取抽取记录（游标分页）
+  // cursor: 上一页返回的 next_cursor，不传则获取第一页
+  getRecords: (cursor, limit) => {
+    const queryParams = [];
+    if (cursor) queryParams.push(`cursor=${encodeURIComponent(cursor)}`);
+    if (limit) queryParams.push(`limit=${limit}`);
+
+    const queryString = queryParams.length > 0 ? '?' + queryParams.join('&') : '';
+
+    return request({
+      url: '/api/draw/records' + queryString,
       method: 'GET'
     });
   }
 };
 
+// 美食目录相关API
+const foodApi = {
+  // 获取美食列表（分页），筛选参数同 draw，另支持 page、page_size
+  // 响应按请求地址连同 ETag 缓存在本地，再次请求时携带 If-None-Match，
+  // 服务端返回 304 时直接使用本地缓存
+  getFoods: (params = {}) => {
+    const queryParams = [];
+    if (params.meal_type) queryParams.push(`meal_type=${params.meal_type}`);
+    if (params.min_price !== undefined) queryParams.push(`min_price=${params.min_price}`);
+    if (params.max_price !== undefined) queryParams.push(`max_price=${params.max_price}`);
+    if (params.category) queryParams.push(`category=${encodeURIComponent(params.category)}`);
+    if (params.page) queryParams.push(`page=${params.page}`);
+    if (params.page_size) queryParams.push(`page_size=${params.page_size}`);
+
+    const url = '/api/foods' + (queryParams.length > 0 ? '?' + queryParams.join('&') : '');
+    const cacheKey = 'foodsCache:' + url;
+    const cached = wx.getStorageSync(cacheKey);
+
+    return new Promise((resolve, reject) => {
+      wx.request({
+        url: BASE_URL + url,
+        method: 'GET',
+        header: cached ? { 'If-None-Match': cached.etag } : {},
+        success: (res) => {
+          if (res.statusCode === 304 && cached) {
+            resolve(cached.data);
+          } else if (res.statusCode >= 200 && res.statusCode < 300) {
+            const etag = res.header && (res.header.ETag || res.header.Etag || res.header.etag);
+            if (etag && res.data && res.data.code === 0) {
+              wx.setStorageSync(cacheKey, { etag, data: res.data });
+            }
+            resolve(res.data);
+          } else {
+            reject(res.data);
+          }
+        },
+        fail: (err) => {
+          // 网络不可用时退回本地缓存
+          if (cached) {
+            resolve(cached.data);
+            return;
+          }
+          wx.showToast({
+            title: '网络请求失败',
+            icon: 'none'
+          });
+          reject(err);
+        }
+      });
+    });
+  },
+
+  // 搜索美食：q 支持菜名子串、全拼和拼音首字母（如 hsr -> 红烧肉）
+  searchFoods: (q, limit) => {
+    const queryParams = [`q=${encodeURIComponent(q)}`];
+    if (limit) queryParams.push(`limit=${limit}`);
+
+    return request({
+      url: '/api/foods/search?' + queryParams.join('&'),
+      method: 'GET'
+    });
+  },
+
+  // 获取筛选计数：各餐饮类型、分类、价格区间在当前筛选条件下的美食数量，参数同 draw
+  // 计数为 0 的筛选项可以置灰
+  getFacets: (params = {}) => {
+    const queryParams = [];
+    if (params.meal_type) queryParams.push(`meal_type=${params.meal_type}`);
+    if (params.min_price !== undefined) queryParams.push(`min_price=${params.min_price}`);
+    if (params.max_price !== undefined) queryParams.push(`max_price=${params.max_price}`);
+    if (params.category) queryParams.push(`category=${encodeURIComponent(params.category)}`);
+
+    const queryString = queryParams.length > 0 ? '?' + queryParams.join('&') : '';
+
+    return request({
+      url: '/api/foods/facets' + queryString,
+      method: 'GET'
+    });
+  },
+
+  // 增量同步美食目录到本地缓存，返回 { syncVersion, foods: { [id]: food } }
+  // 首次从 since=0 全量拉取，之后只拉取上次同步后新增、修改和删除的美食
+  syncFoods: async () => {
+    const catalog = wx.getStorageSync('foodCatalog') || { syncVersion: 0, foods: {} };
+    let hasMore = true;
+    while (hasMore) {
+      const res = await request({
+        url: `/api/foods/changes?since=${catalog.syncVersion}`,
+        method: 'GET'
+      });
+      if (res.code !== 0) {
+        throw new Error(res.msg || '同步美食目录失败');
+      }
+      const data = res.data;
+      data.foods.forEach((food) => {
+        catalog.foods[food.id] = food;
+      });
+      data.deleted.forEach((id) => {
+        delete catalog.foods[id];
+      });
+      catalog.syncVersion = data.sync_version;
+      hasMore = data.has_more;
+    }
+    wx.setStorageSync('foodCatalog', catalog);
+    return catalog;
+  }
+};
+
 // 健康检查
 const healthApi = {
   check: () => {
@@ -202,6 +337,7 @@ module.exports = {
   request,
   userApi,
   drawApi,
+  foodApi,
   healthApi,
   BASE_URL
 };
\ No newline at end of file
@@ -11,7 +11,7 @@ from alembic import context
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import Base
-from app.models import User, Food, DrawRecord
+from app.models import User, Food, FoodTombstone, DrawRecord, UserDailyQuota
 from app.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,32 @@
+"""add (user_id, drawn_at) composite index to draw_records
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """为每日抽取次数查询添加 (user_id, drawn_at) 复合索引"""
+    op.create_index(
+        'ix_draw_records_user_id_drawn_at',
+        'draw_records',
+        ['user_id', 'drawn_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_draw_records_user_id_drawn_at', table_name='draw_records')
@@ -0,0 +1,55 @@
+"""add user_daily_quota table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-05 00:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _local_utc_offset() -> str:
+    """服务器本地时区当前的 UTC 偏移，如 '+08:00'（与 DrawService 使用的 date.today() 一致）"""
+    offset = datetime.now().astimezone().utcoffset()
+    minutes = int(offset.total_seconds()) // 60
+    sign = "-" if minutes < 0 else "+"
+    return f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def upgrade() -> None:
+    """创建每日抽取次数计数表，并根据已有抽取记录回填"""
+    op.create_table(
+        'user_daily_quota',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('used', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+    # 回填：按用户和日期统计已有抽取记录
+    # 应用按服务器本地日期（date.today()）记账，而 date(drawn_at) 使用数据库会话时区，
+    # 两者不同时今日计数会落到错误的日期上，因此按服务器当前的 UTC 偏移换算成本地日期。
+    # 只有今日的计数行会被读取，历史日期跨越夏令时切换带来的偏差不影响次数限制
+    op.execute(sa.text("""
+        INSERT INTO user_daily_quota (user_id, day, used)
+        SELECT user_id, date(drawn_at AT TIME ZONE CAST(:utc_offset AS interval)), COUNT(*)
+        FROM draw_records
+        WHERE drawn_at IS NOT NULL
+        GROUP BY user_id, date(drawn_at AT TIME ZONE CAST(:utc_offset AS interval))
+    """).bindparams(utc_offset=_local_utc_offset()))
+
+
+def downgrade() -> None:
+    op.drop_table('user_daily_quota')
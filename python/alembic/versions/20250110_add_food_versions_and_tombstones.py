@@ -0,0 +1,107 @@
+"""add version/updated_at to foods and food_tombstones table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    为美食目录增量同步增加单调递增的变更序号
+
+    - foods.version    : 每次插入/更新时由触发器从 food_version_seq 取新值
+    - food_tombstones  : 删除美食时由触发器写入墓碑，同样从 food_version_seq 取序号
+    触发器在数据库内生效，ORM、初始化脚本和手写 SQL 的修改都会被记录
+
+    取序号前先获取事务级咨询锁，锁在事务提交后才释放，修改 foods 的事务因此串行执行，
+    序号顺序与提交顺序一致：客户端同步到序号 N 后，不会再有序号小于 N 的修改提交
+    （否则先取号后提交的修改会被跳过）。美食目录修改很少，串行化的代价可以忽略
+    """
+    op.execute("CREATE SEQUENCE food_version_seq")
+
+    op.add_column('foods', sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('foods', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+    # 回填：已有美食按 ID 顺序分配序号
+    op.execute("""
+        UPDATE foods SET version = numbered.version
+        FROM (SELECT id, nextval('food_version_seq') AS version FROM foods ORDER BY id) AS numbered
+        WHERE foods.id = numbered.id
+    """)
+    op.execute("UPDATE foods SET updated_at = created_at WHERE created_at IS NOT NULL")
+    op.create_index('ix_foods_version', 'foods', ['version'], unique=False)
+
+    op.create_table(
+        'food_tombstones',
+        sa.Column('food_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('food_id')
+    )
+    op.create_index('ix_food_tombstones_version', 'food_tombstones', ['version'], unique=False)
+
+    op.execute("""
+        CREATE FUNCTION foods_bump_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+            PERFORM pg_advisory_xact_lock(hashtext('food_version_seq'));
+            IF TG_OP = 'INSERT' THEN
+                DELETE FROM food_tombstones WHERE food_id = NEW.id;
+            END IF;
+            NEW.version := nextval('food_version_seq');
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER foods_bump_version
+        BEFORE INSERT OR UPDATE ON foods
+        FOR EACH ROW EXECUTE FUNCTION foods_bump_version()
+    """)
+
+    op.execute("""
+        CREATE FUNCTION foods_write_tombstone() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('food_version_seq'));
+            INSERT INTO food_tombstones (food_id, version, deleted_at)
+            VALUES (OLD.id, nextval('food_version_seq'), now())
+            ON CONFLICT (food_id) DO UPDATE
+                SET version = EXCLUDED.version, deleted_at = EXCLUDED.deleted_at;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER foods_write_tombstone
+        AFTER DELETE ON foods
+        FOR EACH ROW EXECUTE FUNCTION foods_write_tombstone()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS foods_write_tombstone ON foods")
+    op.execute("DROP TRIGGER IF EXISTS foods_bump_version ON foods")
+    op.execute("DROP FUNCTION IF EXISTS foods_write_tombstone()")
+    op.execute("DROP FUNCTION IF EXISTS foods_bump_version()")
+    op.drop_index('ix_food_tombstones_version', table_name='food_tombstones')
+    op.drop_table('food_tombstones')
+    op.drop_index('ix_foods_version', table_name='foods')
+    op.drop_column('foods', 'updated_at')
+    op.drop_column('foods', 'version')
+    op.execute("DROP SEQUENCE IF EXISTS food_version_seq")
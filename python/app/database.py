@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -17,6 +18,21 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步数据库引擎（asyncpg 驱动），供 async def 路由使用，查询时不阻塞事件循环
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_size=settings.ASYNC_POOL_SIZE,
+    max_overflow=settings.ASYNC_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+)
+
+# expire_on_commit=False：提交后仍可直接读取对象属性，避免在异步上下文中触发隐式懒加载
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -27,3 +43,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        yield db
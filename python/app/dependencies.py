@@ -1,18 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.auth import AuthService
+from app.database import get_db, get_async_db
+from app.services.auth import AuthService, AsyncAuthService
+from app.services.user_cache import CachedUser, user_cache
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """获取当前登录用户"""
+def get_token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    """校验 Bearer Token 并返回其中的用户ID"""
     token = credentials.credentials
     payload = AuthService.verify_token(token)
 
@@ -31,12 +30,62 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = AuthService.get_user_by_id(db, int(user_id))
+    return int(user_id)
+
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="用户不存在",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> CachedUser:
+    """获取当前登录用户（优先读取进程内用户缓存）"""
+    user_id = get_token_user_id(credentials)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = AuthService.get_user_by_id(db, user_id)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="用户不存在",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _user_not_found()
+
+    return user_cache.set(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CachedUser:
+    """获取当前登录用户（异步数据库会话，供 async def 路由使用，优先读取进程内用户缓存）"""
+    user_id = get_token_user_id(credentials)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = await AsyncAuthService.get_user_by_id(db, user_id)
+    if user is None:
+        raise _user_not_found()
+
+    return user_cache.set(user)
+
+
+async def get_current_db_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    获取当前登录用户的 ORM 对象（不经过缓存）
+
+    供需要修改用户信息的路由使用，修改提交后需调用 user_cache.invalidate
+    """
+    user = await AsyncAuthService.get_user_by_id(db, get_token_user_id(credentials))
+    if user is None:
+        raise _user_not_found()
 
     return user
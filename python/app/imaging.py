@@ -0,0 +1,20 @@
+"""
+图片处理工具（Pillow）
+
+美食图片生成脚本和头像缩略图共用的缩放逻辑
+"""
+
+from PIL import Image, ImageOps
+
+
+def get_resample_method():
+    """兼容 Pillow 新旧版本的 LANCZOS 重采样常量。"""
+    try:
+        return Image.Resampling.LANCZOS  # Pillow >= 10
+    except AttributeError:
+        return Image.LANCZOS            # Pillow < 10
+
+
+def fit_square(img: Image.Image, size: int) -> Image.Image:
+    """居中裁剪为正方形并缩放到 size x size（头像按圆形展示，裁掉多余的边）"""
+    return ImageOps.fit(img, (size, size), method=get_resample_method())
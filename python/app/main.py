@@ -1,14 +1,21 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.config import settings
-from app.routers import user_router, draw_router
+from app.routers import user_router, draw_router, food_router
 from app.openapi_i18n import apply_chinese_descriptions
+from app.schemas.response import ORJSONResponse, error
+from app.services.wechat import WechatService
+from app.services.user_cache import user_cache
+from app.services.token_cache import token_cache
+from app.services.food_search import food_search
+from app.services.password_hasher import password_hasher
+from app.services.avatar import AvatarService, AvatarStaticFiles
 
 # 确保静态文件目录存在
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
@@ -17,6 +24,16 @@ AVATARS_DIR = os.path.join(STATIC_DIR, "avatars")
 os.makedirs(IMAGES_DIR, exist_ok=True)
 os.makedirs(AVATARS_DIR, exist_ok=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：关闭时释放共享的 HTTP 客户端连接池、密码哈希和头像缩略图进程池"""
+    yield
+    await WechatService.close_http_client()
+    password_hasher.shutdown()
+    AvatarService.shutdown()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="""
@@ -41,6 +58,8 @@ Authorization: Bearer <your_token>
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 中间件
@@ -52,21 +71,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 挂载静态文件目录
+# 挂载静态文件目录（头像目录单独挂载，兼容分片前的平铺 URL，需在 /static 之前）
+app.mount("/static/avatars", AvatarStaticFiles(directory=AVATARS_DIR), name="avatars")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # 注册路由
 app.include_router(user_router)
 app.include_router(draw_router)
+app.include_router(food_router)
 
 
 # 全局异常处理 - HTTP异常（包括认证失败等）
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-    return JSONResponse(
-        status_code=200,
-        content={"code": exc.status_code, "msg": exc.detail, "data": None}
-    )
+    return error(msg=exc.detail, code=exc.status_code)
 
 
 # 全局异常处理 - 参数验证错误
@@ -77,23 +95,14 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         first_error = errors[0]
         field = first_error.get("loc", ["", ""])[-1]
         msg = first_error.get("msg", "参数验证失败")
-        return JSONResponse(
-            status_code=200,
-            content={"code": 1, "msg": f"参数错误: {field} - {msg}", "data": None}
-        )
-    return JSONResponse(
-        status_code=200,
-        content={"code": 1, "msg": "参数验证失败", "data": None}
-    )
+        return error(msg=f"参数错误: {field} - {msg}")
+    return error(msg="参数验证失败")
 
 
 # 全局异常处理 - 通用异常
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
-        status_code=200,
-        content={"code": 1, "msg": str(exc) if settings.DEBUG else "服务器内部错误", "data": None}
-    )
+    return error(msg=str(exc) if settings.DEBUG else "服务器内部错误")
 
 
 @app.get("/", tags=["健康检查"])
@@ -116,6 +125,23 @@ def health_check():
     return {"code": 0, "msg": "success", "data": {"status": "healthy"}}
 
 
+@app.get("/health/wechat", tags=["健康检查"])
+def wechat_health_check():
+    """微信接口熔断器状态、失败率和延迟指标（当前 worker 进程）"""
+    return {"code": 0, "msg": "success", "data": WechatService.breaker.metrics()}
+
+
+@app.get("/health/caches", tags=["健康检查"])
+def cache_health_check():
+    """进程内缓存的大小和命中率（当前 worker 进程）"""
+    data = {
+        "users": user_cache.metrics(),
+        "tokens": token_cache.metrics(),
+        "food_search": food_search.metrics(),
+    }
+    return {"code": 0, "msg": "success", "data": data}
+
+
 def custom_openapi():
     """自定义 OpenAPI schema 生成，支持中文化"""
     if app.openapi_schema:
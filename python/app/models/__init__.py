@@ -1,5 +1,7 @@
 from app.models.user import User
 from app.models.food import Food
+from app.models.food_tombstone import FoodTombstone
 from app.models.draw_record import DrawRecord
+from app.models.user_daily_quota import UserDailyQuota
 
-__all__ = ["User", "Food", "DrawRecord"]
+__all__ = ["User", "Food", "FoodTombstone", "DrawRecord", "UserDailyQuota"]
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class DrawRecord(Base):
     __tablename__ = "draw_records"
+    __table_args__ = (
+        # 抽取记录游标分页：WHERE user_id = ? AND (drawn_at, id) < (?, ?) ORDER BY drawn_at DESC, id DESC
+        # （每日抽取次数改由 user_daily_quota 计数，不再扫描本表）
+        Index("ix_draw_records_user_id_drawn_at", "user_id", "drawn_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, func
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Numeric, FetchedValue, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -14,6 +14,9 @@ class Food(Base):
     price = Column(Numeric(10, 2), nullable=True)  # 价格，保留2位小数
     image_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 变更序号和更新时间：由数据库触发器在插入/更新时写入（序号取自 food_version_seq，全表单调递增）
+    version = Column(BigInteger, nullable=False, server_default="0", server_onupdate=FetchedValue(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())
 
     # Relationships
     draw_records = relationship("DrawRecord", back_populates="food")
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, func
+from app.database import Base
+
+
+class FoodTombstone(Base):
+    """已删除美食的墓碑，由数据库触发器在删除 foods 行时写入，供美食目录增量同步使用"""
+    __tablename__ = "food_tombstones"
+
+    food_id = Column(Integer, primary_key=True)  # 被删除的美食ID
+    version = Column(BigInteger, nullable=False, index=True)  # 删除时分配的变更序号（food_version_seq）
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from app.database import Base
+
+
+class UserDailyQuota(Base):
+    __tablename__ = "user_daily_quota"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # 抽取日期（服务器本地时区）
+    used = Column(Integer, nullable=False, default=0)  # 当日已抽取次数
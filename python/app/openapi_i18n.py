@@ -23,9 +23,29 @@ def get_path_summaries() -> dict:
             "summary": "抽取美食",
             "description": "随机抽取一道美食，每日限3次免费抽取机会"
         },
+        "/api/draw/batch": {
+            "summary": "批量抽取美食",
+            "description": "一次随机抽取多道互不相同的美食，每道美食消耗一次抽取机会"
+        },
         "/api/draw/records": {
             "summary": "获取抽取记录",
-            "description": "获取用户最近30条抽取历史记录"
+            "description": "按抽取时间倒序游标分页获取用户的抽取历史记录"
+        },
+        "/api/foods": {
+            "summary": "获取美食列表",
+            "description": "按抽取美食的筛选条件分页获取美食目录，支持 ETag 条件请求"
+        },
+        "/api/foods/changes": {
+            "summary": "美食目录增量同步",
+            "description": "获取指定变更序号之后新增、修改和删除的美食"
+        },
+        "/api/foods/search": {
+            "summary": "搜索美食",
+            "description": "按菜名子串、全拼或拼音首字母搜索美食"
+        },
+        "/api/foods/facets": {
+            "summary": "美食筛选计数",
+            "description": "统计当前筛选条件下各餐饮类型、分类和价格区间的美食数量"
         },
         "/": {
             "summary": "API 根路径",
@@ -34,6 +54,14 @@ def get_path_summaries() -> dict:
         "/health": {
             "summary": "健康检查",
             "description": "检查 API 服务运行状态"
+        },
+        "/health/wechat": {
+            "summary": "微信接口状态",
+            "description": "查看当前进程微信登录接口的熔断器状态、失败率和延迟指标"
+        },
+        "/health/caches": {
+            "summary": "缓存状态",
+            "description": "查看当前进程内各缓存的大小、命中次数和未命中次数"
         }
     }
 
@@ -48,6 +76,8 @@ def get_field_descriptions() -> dict:
         "password": "密码",
         "nickname": "用户昵称",
         "avatar": "头像URL地址",
+        "avatar_size": "头像展示尺寸（像素）",
+        "avatar_format": "缩略图格式",
         "gender": "性别：0=未知，1=男，2=女",
         "balance": "账户余额（单位：元）",
         "total_spent": "累计消费金额（单位：元）",
@@ -68,6 +98,11 @@ def get_field_descriptions() -> dict:
         "drawn_at": "抽取时间",
         "food": "抽中的美食",
         "records": "抽取记录列表",
+        "cursor": "分页游标",
+        "next_cursor": "下一页游标，为空表示没有更多记录",
+        "limit": "每页条数",
+        "foods": "抽中的美食列表",
+        "distractors": "抽取动画使用的陪衬美食列表",
 
         # 响应相关
         "success": "操作是否成功",
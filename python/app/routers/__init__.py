@@ -1,4 +1,5 @@
 from app.routers.user import router as user_router
 from app.routers.draw import router as draw_router
+from app.routers.food import router as food_router
 
-__all__ = ["user_router", "draw_router"]
+__all__ = ["user_router", "draw_router", "food_router"]
@@ -1,25 +1,27 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from decimal import Decimal
-from app.database import get_db
-from app.schemas.food import FoodResponse
+from app.database import get_async_db
 from app.schemas.response import success, error
-from app.services.draw import DrawService
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.draw import AsyncDrawService
+from app.services.catalog import food_catalog
+from app.dependencies import get_current_user_async
+from app.services.user_cache import CachedUser
+from app.config import settings
 
 router = APIRouter(prefix="/api/draw", tags=["抽取美食"])
 
 
 @router.post("")
-def draw_food(
+async def draw_food(
     meal_type: Optional[int] = Query(None, ge=1, le=4, description="餐饮类型: 1=早餐, 2=午餐, 3=晚餐, 4=夜宵"),
     min_price: Optional[Decimal] = Query(None, ge=0, description="最小价格（传此参数则筛选>=该价格的食物）"),
     max_price: Optional[Decimal] = Query(None, ge=0, description="最大价格（传此参数则筛选<=该价格的食物）"),
     category: Optional[str] = Query(None, description="美食分类: 中餐、西餐、日料、韩餐、小吃、甜点、饮品等"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    distractors: int = Query(0, ge=0, le=20, description="同时返回的陪衬美食数量（用于抽取动画）"),
+    current_user: CachedUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     抽取美食
@@ -34,48 +36,106 @@ def draw_food(
     - **min_price**: 最小价格，传此参数则筛选 >= 该价格的食物
     - **max_price**: 最大价格，传此参数则筛选 <= 该价格的食物
     - **category**: 美食分类 (中餐、西餐、日料、韩餐、小吃、甜点、饮品等)
+    - **distractors**: 陪衬美食数量，传此参数则额外返回同一筛选条件下的其他美食（仅名称和图片），
+      供抽取动画转盘展示和预加载图片
 
     需要在请求头中携带 Bearer Token
     """
-    record, message, remaining = DrawService.draw(
+    record, food, message, remaining = await AsyncDrawService.draw(
         db, current_user.id, meal_type, min_price, max_price, category
     )
 
     if record is None:
         return error(msg=message)
 
+    data = {
+        "food": food_catalog.food_payload(food),
+        "remaining_times": remaining
+    }
+    if distractors:
+        data["distractors"] = [
+            {"name": item.name, "image_url": item.image_url}
+            for item in await AsyncDrawService.get_distractors(
+                db, food.id, distractors, meal_type, min_price, max_price, category
+            )
+        ]
+
+    return success(msg=message, data=data)
+
+
+@router.post("/batch")
+async def draw_food_batch(
+    n: int = Query(3, ge=1, le=10, description="抽取数量"),
+    meal_type: Optional[int] = Query(None, ge=1, le=4, description="餐饮类型: 1=早餐, 2=午餐, 3=晚餐, 4=夜宵"),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="最小价格（传此参数则筛选>=该价格的食物）"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="最大价格（传此参数则筛选<=该价格的食物）"),
+    category: Optional[str] = Query(None, description="美食分类: 中餐、西餐、日料、韩餐、小吃、甜点、饮品等"),
+    current_user: CachedUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量抽取美食
+
+    - 一次抽取 n 道互不相同的美食，筛选参数与单次抽取相同
+    - 每道美食消耗一次抽取次数，剩余次数不足 n 次时整批失败且不消耗次数
+    - 符合条件的美食不足 n 道时，只返回现有的美食并只消耗相应次数
+    - 所有抽取记录一次性写入
+
+    需要在请求头中携带 Bearer Token
+    """
+    records, foods, message, remaining = await AsyncDrawService.draw_batch(
+        db, current_user.id, n, meal_type, min_price, max_price, category
+    )
+
+    if not records:
+        return error(msg=message)
+
     return success(
         msg=message,
         data={
-            "food": FoodResponse.model_validate(record.food).model_dump(),
+            "foods": [food_catalog.food_payload(food) for food in foods],
             "remaining_times": remaining
         }
     )
 
 
 @router.get("/records")
-def get_draw_records(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_draw_records(
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的 next_cursor，不传则从最新记录开始"),
+    limit: Optional[int] = Query(None, ge=1, description="每页条数"),
+    current_user: CachedUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取抽取记录
 
-    返回过去 30 条抽取记录
+    按抽取时间倒序分页返回抽取记录，默认每页 30 条
+
+    - **cursor**: 分页游标，传入上一页返回的 next_cursor 获取下一页
+    - **limit**: 每页条数
+
+    返回的 next_cursor 为空表示没有更多记录
 
     需要在请求头中携带 Bearer Token
     """
-    records = DrawService.get_user_records(db, current_user.id, limit=30)
+    page_size = min(limit or settings.DRAW_RECORDS_PAGE_SIZE, settings.DRAW_RECORDS_MAX_PAGE_SIZE)
+    try:
+        records, next_cursor = await AsyncDrawService.get_user_records(
+            db, current_user.id, limit=page_size, cursor=cursor
+        )
+    except ValueError as e:
+        return error(msg=str(e))
 
     return success(
         data={
             "records": [
                 {
                     "id": record.id,
-                    "food": FoodResponse.model_validate(record.food).model_dump(),
+                    "food": food_catalog.food_payload(record.food),
                     "drawn_at": record.drawn_at.isoformat()
                 }
                 for record in records
-            ]
+            ],
+            "next_cursor": next_cursor
         }
     )
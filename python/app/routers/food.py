@@ -0,0 +1,203 @@
+import hashlib
+from fastapi import APIRouter, Query, Request, Response
+from typing import Optional
+from decimal import Decimal
+from app.schemas.response import success
+from app.services.catalog import CatalogSnapshot, food_catalog
+from app.services.food_search import food_search
+from app.config import settings
+
+router = APIRouter(prefix="/api/foods", tags=["美食目录"])
+
+
+def _etag(snapshot: CatalogSnapshot, request: Request) -> str:
+    """
+    强 ETag：由美食目录快照版本、同步序号和查询参数计算
+
+    snapshot.version 只反映美食内容，删除美食留下的墓碑或内容未变的版本号变化只会改变
+    sync_version，响应体中带有 sync_version，因此两者都要参与计算。
+    同一快照下相同查询参数返回的内容逐字节一致，不同筛选条件或页码对应不同的 ETag
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{snapshot.version}:{snapshot.sync_version}?{query}".encode("utf-8")).hexdigest()[:16]
+    return f'"{snapshot.version}-{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（按 RFC 9110 使用弱比较，忽略 W/ 前缀）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag: str) -> dict:
+    # no-cache：客户端可以缓存，但每次使用前需带 If-None-Match 重新验证
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+@router.get("")
+async def list_foods(
+    request: Request,
+    meal_type: Optional[int] = Query(None, ge=1, le=4, description="餐饮类型: 1=早餐, 2=午餐, 3=晚餐, 4=夜宵"),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="最小价格（传此参数则筛选>=该价格的食物）"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="最大价格（传此参数则筛选<=该价格的食物）"),
+    category: Optional[str] = Query(None, description="美食分类: 中餐、西餐、日料、韩餐、小吃、甜点、饮品等"),
+    page: int = Query(1, ge=1, description="页码，从 1 开始"),
+    page_size: Optional[int] = Query(None, ge=1, description="每页条数")
+):
+    """
+    获取美食列表
+
+    从进程内美食目录快照分页返回美食，筛选参数与抽取美食接口一致，无需登录
+
+    - **meal_type**: 餐饮类型 (1=早餐, 2=午餐, 3=晚餐, 4=夜宵)
+    - **min_price**: 最小价格，传此参数则筛选 >= 该价格的食物
+    - **max_price**: 最大价格，传此参数则筛选 <= 该价格的食物
+    - **category**: 美食分类 (中餐、西餐、日料、韩餐、小吃、甜点、饮品等)
+    - **page**: 页码，从 1 开始
+    - **page_size**: 每页条数，默认 50
+
+    不带价格筛选时按美食 ID 升序，带价格筛选时按价格升序（同价格按 ID 升序）
+
+    返回的 sync_version 可作为 /api/foods/changes 的 since 参数，之后只同步增量
+
+    响应头带有强 ETag，客户端缓存后在请求头携带 If-None-Match，
+    目录未变化时返回 304 Not Modified（不返回响应体）
+    """
+    snapshot = await food_catalog.get_snapshot_async()
+    etag = _etag(snapshot, request)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+
+    page_size = min(page_size or settings.FOODS_PAGE_SIZE, settings.FOODS_MAX_PAGE_SIZE)
+    foods = snapshot.candidates(meal_type, min_price, max_price, category)
+    offset = (page - 1) * page_size
+
+    response = success(
+        data={
+            "foods": [food_catalog.food_payload(food) for food in foods[offset:offset + page_size]],
+            "total": len(foods),
+            "page": page,
+            "page_size": page_size,
+            "version": snapshot.version,
+            "sync_version": snapshot.sync_version
+        }
+    )
+    response.headers.update(_cache_headers(etag))
+    return response
+
+
+@router.get("/changes")
+async def get_food_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="上次同步返回的 sync_version，首次同步传 0"),
+    limit: Optional[int] = Query(None, ge=1, description="本次最多返回的变更条数")
+):
+    """
+    美食目录增量同步
+
+    返回变更序号大于 since 的新增、修改和删除的美食，无需登录
+
+    - **since**: 上次同步返回的 sync_version，首次同步传 0（返回全部美食）
+    - **limit**: 本次最多返回的变更条数
+
+    返回数据：
+    - **foods**: 新增或修改的美食（最新内容）
+    - **deleted**: 已删除的美食ID
+    - **sync_version**: 下次同步使用的 since
+    - **has_more**: 为 true 时立即用新的 sync_version 继续请求
+
+    目录没有变化时 foods 和 deleted 均为空
+    """
+    snapshot = await food_catalog.get_snapshot_async()
+    etag = _etag(snapshot, request)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+
+    limit = min(limit or settings.FOODS_CHANGES_PAGE_SIZE, settings.FOODS_CHANGES_MAX_PAGE_SIZE)
+    changes, sync_version, has_more = snapshot.changes_since(since, limit)
+
+    response = success(
+        data={
+            "foods": [food_catalog.food_payload(change.food) for change in changes if change.food is not None],
+            "deleted": [change.food_id for change in changes if change.food is None],
+            "sync_version": sync_version,
+            "has_more": has_more
+        }
+    )
+    response.headers.update(_cache_headers(etag))
+    return response
+
+
+@router.get("/search")
+async def search_foods(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=50, description="搜索关键词：菜名、全拼或拼音首字母"),
+    limit: Optional[int] = Query(None, ge=1, description="最多返回条数")
+):
+    """
+    搜索美食
+
+    在进程内 n-gram 倒排索引中搜索（在线程池执行，不阻塞事件循环），无需登录
+
+    - **q**: 搜索关键词，支持菜名子串（烧肉）、全拼（hongshaorou）和拼音首字母（hsr），不区分大小写
+    - **limit**: 最多返回条数，默认 20
+
+    结果按匹配程度排序：完全相同 > 前缀匹配 > 子串匹配，菜名匹配优先于拼音匹配
+    """
+    snapshot = await food_catalog.get_snapshot_async()
+    etag = _etag(snapshot, request)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+
+    limit = min(limit or settings.FOODS_SEARCH_LIMIT, settings.FOODS_SEARCH_MAX_LIMIT)
+    foods = await food_search.search_async(snapshot, q, limit)
+
+    response = success(
+        data={
+            "foods": [food_catalog.food_payload(food) for food in foods]
+        }
+    )
+    response.headers.update(_cache_headers(etag))
+    return response
+
+
+@router.get("/facets")
+async def get_food_facets(
+    request: Request,
+    meal_type: Optional[int] = Query(None, ge=1, le=4, description="餐饮类型: 1=早餐, 2=午餐, 3=晚餐, 4=夜宵"),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="最小价格（传此参数则筛选>=该价格的食物）"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="最大价格（传此参数则筛选<=该价格的食物）"),
+    category: Optional[str] = Query(None, description="美食分类: 中餐、西餐、日料、韩餐、小吃、甜点、饮品等")
+):
+    """
+    美食筛选计数
+
+    根据进程内美食目录快照统计筛选条件下的美食数量，无需登录，筛选参数与抽取美食接口一致
+
+    返回数据：
+    - **total**: 符合全部筛选条件的美食数
+    - **meal_types**: 各餐饮类型的美食数（应用分类和价格条件）
+    - **categories**: 各分类的美食数（应用餐饮类型和价格条件）
+    - **prices**: 价格最小值、最大值、无价格美食数和各价格区间的美食数（应用餐饮类型和分类条件）
+
+    计数为 0 的选项在筛选界面上可以置灰
+    """
+    snapshot = await food_catalog.get_snapshot_async()
+    etag = _etag(snapshot, request)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+
+    facets = snapshot.facets(
+        meal_type, min_price, max_price, category,
+        price_edges=tuple(Decimal(edge) for edge in settings.FOODS_FACET_PRICE_EDGES)
+    )
+
+    response = success(data=facets)
+    response.headers.update(_cache_headers(etag))
+    return response
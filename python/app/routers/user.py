@@ -1,28 +1,39 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-import os
-import uuid
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user import UserCreate, UserLogin, WechatLogin, WechatUserInfo
 from app.schemas.response import success, error
-from app.services.auth import AuthService
-from app.services.draw import DrawService
-from app.services.wechat import WechatService, WechatLoginError
-from app.dependencies import get_current_user
+from app.services.auth import AuthService, AsyncAuthService
+from app.services.draw import AsyncDrawService
+from app.services.wechat import AsyncWechatService, WechatLoginError
+from app.dependencies import get_current_user_async, get_current_db_user_async
 from app.models.user import User
+from app.services.user_cache import CachedUser, user_cache
+from app.services.avatar import AVATAR_URL_PREFIX, AvatarService, AvatarUploadError
 from app.config import settings
 
 router = APIRouter(prefix="/api/user", tags=["用户"])
 
-# 头像上传目录（相对于 python 目录）
-AVATAR_UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "avatars")
-# 确保目录存在
-os.makedirs(AVATAR_UPLOAD_DIR, exist_ok=True)
+# 头像上传接口的请求体说明：接口直接读取请求流，需要手动声明 multipart 文件字段
+AVATAR_UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        }
+    },
+}
 
 
 @router.post("/register")
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     用户注册
 
@@ -30,12 +41,12 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **password**: 密码（至少6字符）
     """
     # 检查用户名是否已存在
-    existing_user = AuthService.get_user_by_username(db, user_data.username)
+    existing_user = await AsyncAuthService.get_user_by_username(db, user_data.username)
     if existing_user:
         return error(msg="用户名已存在")
 
     # 创建用户
-    user = AuthService.create_user(db, user_data.username, user_data.password)
+    user = await AsyncAuthService.create_user(db, user_data.username, user_data.password)
     return success(
         msg="注册成功",
         data={
@@ -47,14 +58,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     用户登录
 
     - **username**: 用户名
     - **password**: 密码
     """
-    user = AuthService.authenticate_user(db, user_data.username, user_data.password)
+    user = await AsyncAuthService.authenticate_user(db, user_data.username, user_data.password)
     if not user:
         return error(msg="用户名或密码错误")
 
@@ -74,7 +85,7 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/wechat/login")
-async def wechat_login(login_data: WechatLogin, db: Session = Depends(get_db)):
+async def wechat_login(login_data: WechatLogin, db: AsyncSession = Depends(get_async_db)):
     """
     微信小程序登录
 
@@ -89,7 +100,7 @@ async def wechat_login(login_data: WechatLogin, db: Session = Depends(get_db)):
     - **user**: 用户信息
     """
     try:
-        user, access_token, is_new_user = await WechatService.login(
+        user, access_token, is_new_user = await AsyncWechatService.login(
             db=db,
             code=login_data.code
         )
@@ -118,8 +129,8 @@ async def wechat_login(login_data: WechatLogin, db: Session = Depends(get_db)):
 @router.put("/wechat/userinfo")
 async def update_wechat_userinfo(
     user_info: WechatUserInfo,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_db_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     更新微信用户信息
@@ -134,10 +145,12 @@ async def update_wechat_userinfo(
     if user_info.nickname is not None:
         current_user.nickname = user_info.nickname
     if user_info.avatar_url is not None:
-        current_user.avatar_url = user_info.avatar_url
+        # 客户端可能回传的是缩略图地址，始终保存原图地址
+        current_user.avatar_url = await AvatarService.original_url_async(user_info.avatar_url)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    user_cache.invalidate(current_user.id)
+    await db.refresh(current_user)
     
     return success(
         msg="用户信息更新成功",
@@ -151,44 +164,37 @@ async def update_wechat_userinfo(
     )
 
 
-@router.post("/avatar/upload")
+@router.post("/avatar/upload", openapi_extra={"requestBody": AVATAR_UPLOAD_REQUEST_BODY})
 async def upload_avatar(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: CachedUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     上传用户头像
 
-    上传图片文件作为用户头像，支持 jpg、jpeg、png、gif 格式。
+    上传图片文件作为用户头像，支持 jpg、png、gif、webp 格式，大小不超过 AVATAR_MAX_BYTES（默认 10 MB）。
     需要在请求头中携带 Bearer Token。
 
     返回:
     - **avatar_url**: 头像访问URL
+
+    接收文件期间不占用数据库连接（上传可能很慢），保存完成后再用一个短事务更新头像URL
     """
-    # 检查文件类型
-    allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-    if file.content_type not in allowed_types:
-        return error(msg="不支持的图片格式，请上传 jpg、png、gif 或 webp 格式的图片")
-    
-    # 生成唯一文件名
-    file_ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-    unique_filename = f"{current_user.id}_{uuid.uuid4().hex[:8]}.{file_ext}"
-    file_path = os.path.join(AVATAR_UPLOAD_DIR, unique_filename)
-    
     try:
-        # 保存文件
-        content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        
+        # 用户缓存未命中时认证查询会占用连接，接收文件前先归还
+        await db.rollback()
+
+        # 流式接收并保存文件（按文件内容判断格式）
+        relative_path = await AvatarService.save_upload(request, current_user.id)
+
         # 生成访问URL
-        avatar_url = f"/static/avatars/{unique_filename}"
+        avatar_url = f"{AVATAR_URL_PREFIX}{relative_path}"
         
         # 更新用户头像URL
-        current_user.avatar_url = avatar_url
-        db.commit()
-        db.refresh(current_user)
+        await db.execute(update(User).where(User.id == current_user.id).values(avatar_url=avatar_url))
+        await db.commit()
+        user_cache.invalidate(current_user.id)
         
         return success(
             msg="头像上传成功",
@@ -196,28 +202,36 @@ async def upload_avatar(
                 "avatar_url": avatar_url
             }
         )
+    except AvatarUploadError as e:
+        return error(msg=str(e))
     except Exception as e:
         return error(msg=f"头像上传失败: {str(e)}")
 
 
 @router.get("/info")
-def get_user_info(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_info(
+    avatar_size: Optional[int] = Query(None, ge=1, le=1024, description="头像展示尺寸（像素），传入时返回最接近的缩略图地址"),
+    avatar_format: str = Query("jpg", pattern="^(jpg|webp)$", description="缩略图格式: jpg 或 webp"),
+    current_user: CachedUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取当前用户信息
 
     需要在请求头中携带 Bearer Token
+
+    - **avatar_size**: 头像展示尺寸（可选），缩略图尚未生成时返回原图地址
+    - **avatar_format**: 缩略图格式（可选，默认 jpg）
     """
-    remaining_times = DrawService.get_remaining_times(db, current_user.id)
+    remaining_times = await AsyncDrawService.get_remaining_times(db, current_user.id)
+    avatar_url = await AvatarService.resolve_url_async(current_user.avatar_url, avatar_size, avatar_format)
 
     return success(
         data={
             "id": current_user.id,
             "username": current_user.username,
             "nickname": current_user.nickname,
-            "avatar_url": current_user.avatar_url,
+            "avatar_url": avatar_url,
             "openid": current_user.openid,
             "created_at": current_user.created_at.isoformat(),
             "today_remaining_times": remaining_times
@@ -1,5 +1,8 @@
+from decimal import Decimal
 from pydantic import BaseModel
-from typing import Generic, TypeVar, Optional
+from starlette.responses import JSONResponse
+from typing import Any, Generic, TypeVar, Optional
+import orjson
 
 T = TypeVar('T')
 
@@ -20,11 +23,82 @@ class ApiResponse(BaseModel, Generic[T]):
         }
 
 
-def success(data: T = None, msg: str = "success") -> dict:
+class RawJSON:
+    """已序列化好的 JSON 片段，ORJSONResponse 输出时原样拼接，不再重复序列化"""
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _default(value: Any) -> Any:
+    """orjson 不能直接序列化的类型，与 FastAPI jsonable_encoder 的输出保持一致"""
+    if isinstance(value, Decimal):
+        # 与 fastapi.encoders.decimal_encoder 一致：没有小数位时输出整数，否则输出浮点数
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError
+
+
+# RawJSON 片段在 orjson 输出中的占位符（orjson 会把 \x00 转义为 \u0000，正常文本几乎不会出现）
+_FRAGMENT_MARKER = "\x00raw-json-fragment\x00"
+_ENCODED_FRAGMENT_MARKER = orjson.dumps(_FRAGMENT_MARKER)
+
+
+def _encode_with_raw(value: Any) -> bytes:
+    """逐层拼接序列化结果，遇到 RawJSON 直接使用其字节"""
+    if isinstance(value, RawJSON):
+        return value.data
+    if isinstance(value, dict):
+        return b"{" + b",".join(
+            orjson.dumps(str(key)) + b":" + _encode_with_raw(item) for key, item in value.items()
+        ) + b"}"
+    if isinstance(value, (list, tuple)):
+        return b"[" + b",".join(_encode_with_raw(item) for item in value) + b"]"
+    return orjson.dumps(value, default=_default)
+
+
+def dumps(value: Any) -> bytes:
+    """
+    序列化为 JSON 字节
+
+    orjson 3.8 没有原样嵌入字节的能力：RawJSON 片段先序列化为占位符，再按出现顺序替换回片段字节
+    """
+    fragments = []
+
+    def default(item: Any) -> Any:
+        if isinstance(item, RawJSON):
+            fragments.append(item.data)
+            return _FRAGMENT_MARKER
+        return _default(item)
+
+    data = orjson.dumps(value, default=default)
+    if not fragments:
+        return data
+    parts = data.split(_ENCODED_FRAGMENT_MARKER)
+    if len(parts) != len(fragments) + 1:
+        # 普通字符串中恰好包含占位符，退回逐层拼接
+        return _encode_with_raw(value)
+    chunks = [parts[0]]
+    for fragment, part in zip(fragments, parts[1:]):
+        chunks.append(fragment)
+        chunks.append(part)
+    return b"".join(chunks)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应，支持嵌入 RawJSON 片段"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def success(data: T = None, msg: str = "success") -> ORJSONResponse:
     """成功响应"""
-    return {"code": 0, "msg": msg, "data": data}
+    return ORJSONResponse({"code": 0, "msg": msg, "data": data})
 
 
-def error(msg: str, code: int = 1, data: T = None) -> dict:
+def error(msg: str, code: int = 1, data: T = None) -> ORJSONResponse:
     """错误响应"""
-    return {"code": code, "msg": msg, "data": data}
+    return ORJSONResponse({"code": code, "msg": msg, "data": data})
@@ -1,5 +1,16 @@
-from app.services.auth import AuthService
-from app.services.draw import DrawService
-from app.services.wechat import WechatService, WechatLoginError
+from app.services.auth import AuthService, AsyncAuthService
+from app.services.draw import DrawService, AsyncDrawService
+from app.services.wechat import WechatService, AsyncWechatService, WechatLoginError
+from app.services.avatar import AvatarService, AvatarUploadError
 
-__all__ = ["AuthService", "DrawService", "WechatService", "WechatLoginError"]
+__all__ = [
+    "AuthService",
+    "AsyncAuthService",
+    "DrawService",
+    "AsyncDrawService",
+    "WechatService",
+    "AsyncWechatService",
+    "WechatLoginError",
+    "AvatarService",
+    "AvatarUploadError",
+]
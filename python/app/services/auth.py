@@ -1,27 +1,23 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.user import User
-
-# 使用 pbkdf2_sha256 替代 bcrypt（bcrypt 5.0.0 与 passlib 不兼容）
-# pbkdf2_sha256 是安全的密码哈希算法，不依赖外部库
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto"
-)
+from app.services.password_hasher import build_context, password_hasher
+from app.services.token_cache import token_cache
 
 
 class AuthService:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return build_context(settings.PASSWORD_HASH_ROUNDS).verify(plain_password, hashed_password)
 
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+        return build_context(settings.PASSWORD_HASH_ROUNDS).hash(password)
 
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -36,11 +32,17 @@ class AuthService:
 
     @staticmethod
     def verify_token(token: str) -> Optional[dict]:
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        """校验 Token 并返回 payload，优先读取校验结果缓存"""
+        secret_key, algorithm = settings.SECRET_KEY, settings.ALGORITHM
+        payload = token_cache.get(token, secret_key, algorithm)
+        if payload is not None:
             return payload
+        try:
+            payload = jwt.decode(token, secret_key, algorithms=[algorithm])
         except JWTError:
             return None
+        token_cache.set(token, secret_key, algorithm, payload)
+        return payload
 
     @staticmethod
     def get_user_by_username(db: Session, username: str) -> Optional[User]:
@@ -62,8 +64,51 @@ class AuthService:
     @staticmethod
     def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
         user = AuthService.get_user_by_username(db, username)
-        if not user:
+        if not user or not user.hashed_password:
+            return None
+        valid, new_hash = build_context(settings.PASSWORD_HASH_ROUNDS).verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            db.commit()
+        return user
+
+
+class AsyncAuthService:
+    """
+    AuthService 中数据库查询的异步版本，供使用 AsyncSession 的 async def 路由调用
+
+    注册和密码登录中 CPU 密集的密码哈希在 password_hasher 的进程池中计算，不占用事件循环
+    """
+
+    @staticmethod
+    async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.username == username))
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+        return await db.get(User, user_id)
+
+    @staticmethod
+    async def create_user(db: AsyncSession, username: str, password: str) -> User:
+        hashed_password = await password_hasher.hash(password)
+        db_user = User(username=username, hashed_password=hashed_password)
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+        """校验用户名和密码，哈希迭代次数与当前配置不同时顺带更新为新哈希"""
+        user = await AsyncAuthService.get_user_by_username(db, username)
+        if not user or not user.hashed_password:
             return None
-        if not AuthService.verify_password(password, user.hashed_password):
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
         return user
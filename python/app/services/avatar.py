@@ -0,0 +1,448 @@
+"""
+头像文件服务模块
+
+头像上传直接从请求流中解析 multipart 数据并分块写入磁盘，不经过 Starlette 的表单解析（它会先把整个文件缓存下来）：
+1. 请求声明的 Content-Length 超过上限时直接拒绝；流式接收过程中累计超过 AVATAR_MAX_BYTES 时立即中止
+2. 根据文件头的魔数判断图片格式（不信任客户端提供的 content_type 和文件名），扩展名由实际格式决定
+3. 数据先写入同目录下的临时文件，接收完成后用 Pillow 完整解码校验，通过后原子重命名为正式文件名，
+   只有文件头或被截断的图片不会被保存为头像
+4. 磁盘写入在线程池中执行，大文件上传不会阻塞事件循环
+
+上传完成后在后台进程池中把原图裁剪缩放为 AVATAR_THUMBNAIL_SIZES 中各尺寸的正方形 WebP/JPEG 缩略图，
+文件名为 {原文件名}_{尺寸}.{webp|jpg}；读取头像时可按需要的尺寸解析到对应缩略图，缩略图尚未生成时使用原图
+
+头像按文件名主干的哈希分两级子目录存放（如 3f/a2/22_06b423ca.jpg），原图和它的缩略图位于同一目录，
+避免单个目录下文件过多。早期平铺存放的头像由 migrate_avatar_layout.py 迁移，
+迁移前后旧的平铺 URL 都可以通过 AvatarStaticFiles 正常访问
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from multipart.multipart import MultipartParser, parse_options_header
+from multipart.exceptions import MultipartParseError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.staticfiles import StaticFiles
+
+from app.config import settings
+
+try:
+    from PIL import Image, ImageOps
+    from app.imaging import fit_square
+except ImportError:  # 未安装 Pillow 时不生成缩略图，头像始终使用原图
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# 头像上传目录（相对于 python 目录）
+AVATAR_UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "avatars")
+# 确保目录存在
+os.makedirs(AVATAR_UPLOAD_DIR, exist_ok=True)
+
+# 上传中的临时文件后缀
+TEMP_SUFFIX = ".uploading"
+
+# multipart 边界和各部分头部的额外开销上限，用于根据 Content-Length 提前拒绝
+MULTIPART_OVERHEAD = 16 * 1024
+
+# 累计到该大小后写一次磁盘
+WRITE_CHUNK_SIZE = 64 * 1024
+
+# 头像访问 URL 前缀
+AVATAR_URL_PREFIX = "/static/avatars/"
+
+# 缩略图格式：(URL 中的扩展名, Pillow 格式, 保存参数)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+# 原图可能的扩展名（由上传时的文件头决定）
+ORIGINAL_EXTENSIONS = ("jpg", "png", "gif", "webp")
+
+# 缩略图文件名：{用户ID}_{8位随机串}_{尺寸}.{webp|jpg}
+THUMBNAIL_NAME_RE = re.compile(r"^(?P<stem>\d+_[0-9a-f]{8})_(?P<size>\d+)\.(?P<ext>webp|jpg)$")
+
+
+def avatar_stem(filename: str) -> str:
+    """头像文件名主干：缩略图取对应原图的主干"""
+    match = THUMBNAIL_NAME_RE.match(filename)
+    if match is not None:
+        return match.group("stem")
+    return os.path.splitext(filename)[0]
+
+
+def sharded_path(filename: str) -> str:
+    """头像文件在上传目录下的分片相对路径：{哈希前 2 位}/{哈希 3-4 位}/{文件名}"""
+    digest = hashlib.md5(avatar_stem(filename).encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+def locate_avatar(filename: str) -> Optional[str]:
+    """查找头像文件的相对路径（优先分片目录，其次未迁移的平铺位置），不存在时返回 None"""
+    for relative_path in (sharded_path(filename), filename):
+        if os.path.exists(os.path.join(AVATAR_UPLOAD_DIR, relative_path)):
+            return relative_path
+    return None
+
+
+class AvatarStaticFiles(StaticFiles):
+    """头像静态文件：平铺的旧 URL 找不到文件时回退到分片目录"""
+
+    def lookup_path(self, path: str):
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None and os.sep not in path:
+            return super().lookup_path(os.path.join(*sharded_path(path).split("/")))
+        return full_path, stat_result
+
+
+class AvatarUploadError(Exception):
+    """头像上传失败（错误信息可直接返回给用户）"""
+
+
+def _too_large_message(max_bytes: int) -> str:
+    if max_bytes >= 1024 * 1024:
+        return f"头像文件不能超过 {max_bytes / (1024 * 1024):g} MB"
+    return f"头像文件不能超过 {max_bytes / 1024:g} KB"
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """根据文件头魔数判断图片格式，返回扩展名，不支持的格式返回 None"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def is_valid_image(path: str) -> bool:
+    """
+    用 Pillow 校验图片文件是否完整（在线程池中执行）
+
+    verify 检查文件结构（如 PNG 的块校验和），再按缩略图最大尺寸解码一次，
+    JPEG 等 verify 检查不到的截断数据会在解码时报错；未安装 Pillow 时只能依赖魔数校验
+    """
+    if Image is None:
+        return True
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        with Image.open(path) as img:
+            size = max(settings.AVATAR_THUMBNAIL_SIZES, default=0) or max(img.size)
+            # JPEG 可以按比例缩小解码，校验大图时不必解码全尺寸
+            img.draft("RGB", (size, size))
+            img.load()
+    except Exception:
+        return False
+    return True
+
+
+def generate_thumbnails(path: str, sizes: Sequence[int]) -> List[str]:
+    """
+    为原图生成各尺寸的 WebP/JPEG 缩略图（在后台进程中执行）
+
+    复用美食图片脚本的 LANCZOS 缩放；先处理最大尺寸，较小尺寸在上一级结果上继续缩小。
+    每个文件先写入临时文件再原子重命名
+
+    Returns:
+        生成的缩略图路径列表
+    """
+    directory = os.path.dirname(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    sizes = sorted(set(sizes), reverse=True)
+    written = []
+
+    with Image.open(path) as original:
+        # JPEG 可以在解码时直接按比例缩小，大幅减少大图的解码开销
+        original.draft("RGB", (sizes[0], sizes[0]))
+        # 按 EXIF 方向旋转手机照片；GIF 只取第一帧
+        img = ImageOps.exif_transpose(original).convert("RGB")
+
+    for size in sizes:
+        img = fit_square(img, size)
+        for ext, (image_format, options) in THUMBNAIL_FORMATS.items():
+            target = os.path.join(directory, f"{stem}_{size}.{ext}")
+            temp_path = os.path.join(directory, f".{uuid.uuid4().hex}{TEMP_SUFFIX}")
+            try:
+                img.save(temp_path, format=image_format, **options)
+                os.replace(temp_path, target)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            written.append(target)
+    return written
+
+
+class _AvatarStream:
+    """
+    解析 multipart 请求体并把头像文件部分流式写入临时文件
+
+    multipart 解析器的回调是同步的，回调中只把数据放入缓冲区，
+    由 save 在每次喂入数据后把缓冲区交给线程池写盘
+    """
+
+    def __init__(self, field_name: str, max_bytes: int):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.temp_path = os.path.join(AVATAR_UPLOAD_DIR, f".{uuid.uuid4().hex}{TEMP_SUFFIX}")
+        self.file = None
+        self.extension: Optional[str] = None
+        self.size = 0
+        self.found = False
+        self.finished = False
+        self._in_file_part = False
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._pending = bytearray()
+
+    # multipart 解析器回调
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        # 只接收第一个同名文件部分，其余部分忽略
+        self._in_file_part = name == self.field_name and b"filename" in options and not self.found
+        if self._in_file_part:
+            self.found = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_file_part:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise AvatarUploadError(_too_large_message(self.max_bytes))
+        self._pending += data[start:end]
+
+    def on_part_end(self) -> None:
+        if self._in_file_part:
+            self._in_file_part = False
+            self.finished = True
+
+    # 文件写入
+
+    async def flush(self, force: bool = False) -> None:
+        """把缓冲区写入临时文件；首次写入前先校验文件头"""
+        if not self._pending or (len(self._pending) < WRITE_CHUNK_SIZE and not force):
+            return
+        if self.extension is None:
+            self.extension = sniff_image_type(bytes(self._pending[:12]))
+            if self.extension is None:
+                raise AvatarUploadError("不支持的图片格式，请上传 jpg、png、gif 或 webp 格式的图片")
+            self.file = await run_in_threadpool(open, self.temp_path, "wb")
+        chunk = bytes(self._pending)
+        self._pending.clear()
+        await run_in_threadpool(self.file.write, chunk)
+
+    async def close(self) -> None:
+        if self.file is not None:
+            await run_in_threadpool(self.file.close)
+            self.file = None
+
+    async def discard(self) -> None:
+        """出错时关闭并删除临时文件"""
+        await self.close()
+        if os.path.exists(self.temp_path):
+            await run_in_threadpool(os.remove, self.temp_path)
+
+
+class AvatarService:
+    """头像文件服务"""
+
+    # 生成缩略图的后台进程池
+    _thumbnail_executor: Optional[ProcessPoolExecutor] = None
+    # 进行中的缩略图任务（保留引用，避免任务被垃圾回收）
+    _thumbnail_tasks: set = set()
+
+    @staticmethod
+    def _get_thumbnail_executor() -> Optional[ProcessPoolExecutor]:
+        if settings.AVATAR_THUMBNAIL_WORKERS <= 0:
+            return None
+        if AvatarService._thumbnail_executor is None:
+            AvatarService._thumbnail_executor = ProcessPoolExecutor(
+                max_workers=settings.AVATAR_THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return AvatarService._thumbnail_executor
+
+    @staticmethod
+    def schedule_thumbnails(relative_path: str) -> Optional[asyncio.Future]:
+        """在后台为上传目录下 relative_path 处的原图生成缩略图，不等待完成；未安装 Pillow 时跳过"""
+        if Image is None or not settings.AVATAR_THUMBNAIL_SIZES:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            AvatarService._get_thumbnail_executor(),
+            generate_thumbnails,
+            os.path.join(AVATAR_UPLOAD_DIR, relative_path),
+            tuple(settings.AVATAR_THUMBNAIL_SIZES),
+        )
+        AvatarService._thumbnail_tasks.add(future)
+        future.add_done_callback(AvatarService._on_thumbnails_done)
+        return future
+
+    @staticmethod
+    def _on_thumbnails_done(future: asyncio.Future) -> None:
+        AvatarService._thumbnail_tasks.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("头像缩略图生成失败: %s", future.exception())
+
+    @staticmethod
+    def shutdown() -> None:
+        """关闭缩略图进程池（应用关闭时调用）"""
+        if AvatarService._thumbnail_executor is not None:
+            AvatarService._thumbnail_executor.shutdown(wait=False, cancel_futures=True)
+            AvatarService._thumbnail_executor = None
+
+    @staticmethod
+    def original_url(avatar_url: Optional[str]) -> Optional[str]:
+        """把本地头像缩略图 URL 还原为原图 URL，其他 URL 原样返回"""
+        if not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+            return avatar_url
+        match = THUMBNAIL_NAME_RE.match(avatar_url.rsplit("/", 1)[-1])
+        if match is None:
+            return avatar_url
+        stem = match.group("stem")
+        for extension in ORIGINAL_EXTENSIONS:
+            relative_path = locate_avatar(f"{stem}.{extension}")
+            if relative_path is not None:
+                return f"{AVATAR_URL_PREFIX}{relative_path}"
+        return avatar_url
+
+    @staticmethod
+    def resolve_url(avatar_url: Optional[str], size: Optional[int] = None, image_format: str = "jpg") -> Optional[str]:
+        """
+        把头像 URL 解析为适合展示尺寸的缩略图 URL
+
+        选择不小于 size 的最小缩略图（都小于 size 时选最大的）；
+        非本地头像、未指定尺寸或缩略图尚未生成时返回原 URL
+
+        Args:
+            avatar_url: 用户的头像 URL
+            size: 展示尺寸（像素）
+            image_format: 缩略图格式，jpg 或 webp
+        """
+        if not size or not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+            return avatar_url
+        sizes = sorted(settings.AVATAR_THUMBNAIL_SIZES)
+        if not sizes or image_format not in THUMBNAIL_FORMATS:
+            return avatar_url
+        target = next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+
+        original = AvatarService.original_url(avatar_url)
+        stem = avatar_stem(original.rsplit("/", 1)[-1])
+        relative_path = locate_avatar(f"{stem}_{target}.{image_format}")
+        if relative_path is not None:
+            return f"{AVATAR_URL_PREFIX}{relative_path}"
+        return original
+
+    @staticmethod
+    async def original_url_async(avatar_url: Optional[str]) -> Optional[str]:
+        """original_url 的异步版本：查找本地原图时在线程池中访问磁盘，不阻塞事件循环"""
+        if not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+            return avatar_url
+        return await run_in_threadpool(AvatarService.original_url, avatar_url)
+
+    @staticmethod
+    async def resolve_url_async(
+        avatar_url: Optional[str], size: Optional[int] = None, image_format: str = "jpg"
+    ) -> Optional[str]:
+        """resolve_url 的异步版本：查找本地缩略图时在线程池中访问磁盘，不阻塞事件循环"""
+        if not size or not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+            return avatar_url
+        return await run_in_threadpool(AvatarService.resolve_url, avatar_url, size, image_format)
+
+    @staticmethod
+    async def save_upload(request: Request, user_id: int, field_name: str = "file") -> str:
+        """
+        从 multipart 请求流中接收头像文件并保存
+
+        Args:
+            request: 上传请求
+            user_id: 用户ID（用于生成文件名）
+            field_name: 文件字段名
+
+        Returns:
+            保存后的文件相对于 AVATAR_UPLOAD_DIR 的分片路径，如 3f/a2/22_06b423ca.jpg
+
+        Raises:
+            AvatarUploadError: 请求格式错误、文件过大、图片格式不支持或图片损坏时抛出
+        """
+        max_bytes = settings.AVATAR_MAX_BYTES
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise AvatarUploadError("请使用 multipart/form-data 格式上传头像")
+
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+            raise AvatarUploadError(_too_large_message(max_bytes))
+
+        stream = _AvatarStream(field_name, max_bytes)
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": stream.on_part_begin,
+            "on_part_data": stream.on_part_data,
+            "on_part_end": stream.on_part_end,
+            "on_header_field": stream.on_header_field,
+            "on_header_value": stream.on_header_value,
+            "on_header_end": stream.on_header_end,
+            "on_headers_finished": stream.on_headers_finished,
+        })
+
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await stream.flush(force=stream.finished)
+                if stream.finished:
+                    # 头像部分已接收完整，剩余的表单字段无需解析
+                    break
+            parser.finalize()
+            if not stream.finished:
+                raise AvatarUploadError("请选择要上传的头像文件")
+            await stream.flush(force=True)
+            if stream.extension is None:
+                raise AvatarUploadError("头像文件为空")
+            await stream.close()
+            if not await run_in_threadpool(is_valid_image, stream.temp_path):
+                raise AvatarUploadError("图片文件已损坏或不完整，请重新上传")
+
+            relative_path = sharded_path(f"{user_id}_{uuid.uuid4().hex[:8]}.{stream.extension}")
+            target = os.path.join(AVATAR_UPLOAD_DIR, relative_path)
+            await run_in_threadpool(os.makedirs, os.path.dirname(target), exist_ok=True)
+            # 同一文件系统内的 rename 是原子操作
+            await run_in_threadpool(os.replace, stream.temp_path, target)
+        except MultipartParseError:
+            await stream.discard()
+            raise AvatarUploadError("上传数据格式错误")
+        except BaseException:
+            await stream.discard()
+            raise
+
+        AvatarService.schedule_thumbnails(relative_path)
+        return relative_path
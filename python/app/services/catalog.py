@@ -0,0 +1,502 @@
+"""
+美食目录缓存模块
+
+每个 worker 进程在内存中保留一份 foods 表的只读快照，抽取美食时直接在快照上随机采样，
+数据库只用于持久化抽取记录：
+1. 首次使用时整表加载一次，生成带版本号的快照，并预建按餐饮类型/分类的倒排索引，
+   每个索引桶内再按价格排序，价格区间筛选只需两次二分查找
+2. 每隔 CATALOG_CHECK_INTERVAL 秒用一条聚合查询检查目录是否变化，变化时重新加载。
+   foods 的插入/更新和删除（墓碑）都由数据库触发器分配单调递增的变更序号，
+   两张表的最大序号即可判断是否有任何修改
+3. 快照存在超过 CATALOG_MAX_AGE 秒时强制重新加载（兜底没有触发器的数据库，如内存 SQLite）
+4. 本进程内通过 ORM 修改 foods 并提交后立即标记快照失效
+5. 异步路由中刷新时查询走 asyncpg，建索引放到线程池，不阻塞事件循环；
+   冷启动时并发请求共同等待同一次加载
+
+快照同时按变更序号排序保存全部美食和墓碑，增量同步时二分查找即可取出某个序号之后的变更。
+
+接口返回的美食 JSON（FoodResponse 结构）按 (美食ID, 快照版本) 缓存序列化结果，
+响应时直接拼接字节，不再逐条经过 pydantic 校验和 JSON 编码
+"""
+
+import asyncio
+import bisect
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, literal, null, select, union_all
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.food import Food
+from app.models.food_tombstone import FoodTombstone
+from app.schemas.response import RawJSON, dumps
+
+
+# 快照加载的列，顺序与 CatalogFood 字段一致
+CATALOG_COLUMNS = (
+    Food.id, Food.name, Food.category, Food.meal_type,
+    Food.description, Food.price, Food.image_url,
+)
+
+
+@dataclass(frozen=True)
+class CatalogFood:
+    """快照中的美食条目（与 ORM 对象解耦，可跨会话、跨线程共享）"""
+    id: int
+    name: str
+    category: str
+    meal_type: Optional[int]
+    description: Optional[str]
+    price: Optional[Decimal]
+    image_url: Optional[str]
+
+
+@dataclass(frozen=True)
+class CatalogChange:
+    """一条目录变更：美食的最新内容，或美食已被删除（food 为 None）"""
+    version: int
+    food_id: int
+    food: Optional[CatalogFood]
+
+
+# 倒排索引的键：(meal_type, category)，None 表示该维度不限
+BucketKey = Tuple[Optional[int], Optional[str]]
+
+
+@dataclass(frozen=True)
+class PriceIndex:
+    """按价格升序排列的美食（只包含有价格的美食）"""
+    prices: Tuple[Decimal, ...]
+    foods: Tuple[CatalogFood, ...]
+
+    def range(self, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> Tuple[int, int]:
+        """返回价格落在 [min_price, max_price] 内的下标区间 [lo, hi)"""
+        lo = 0 if min_price is None else bisect.bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect.bisect_right(self.prices, max_price)
+        return lo, max(lo, hi)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """美食目录快照"""
+    version: str  # 由快照内容计算的版本号，各 worker 加载到相同数据时版本号一致
+    fingerprint: Tuple  # 快照包含的 foods 和墓碑的最大变更序号，用于廉价地判断是否需要重新加载
+    foods: Tuple[CatalogFood, ...]
+    by_id: Dict[int, CatalogFood]
+    # 倒排索引：每种 (meal_type, category) 组合（含"不限"）对应的美食列表，加载时一次性预建，
+    # 任意筛选组合都是一次字典查找，无需在请求时求交集
+    buckets: Dict[BucketKey, Tuple[CatalogFood, ...]]
+    # 与 buckets 同键的价格索引
+    price_buckets: Dict[BucketKey, PriceIndex]
+    # 增量同步水位：快照包含的最大变更序号
+    sync_version: int
+    # 按变更序号升序排列的美食和墓碑，以及对应的序号（用于二分查找）
+    changes: Tuple[CatalogChange, ...]
+    change_versions: Tuple[int, ...]
+
+    def get(self, food_id: int) -> Optional[CatalogFood]:
+        return self.by_id.get(food_id)
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+    def changes_since(self, since: int, limit: int) -> Tuple[Tuple[CatalogChange, ...], int, bool]:
+        """
+        获取变更序号大于 since 的至多 limit 条变更
+
+        Returns:
+            (变更列表, 下次同步使用的序号, 是否还有更多变更)
+        """
+        lo = bisect.bisect_right(self.change_versions, since)
+        changes = self.changes[lo:lo + limit]
+        has_more = lo + limit < len(self.changes)
+        if has_more:
+            return changes, changes[-1].version, True
+        return changes, max(since, self.sync_version), False
+
+    def bucket(self, meal_type: Optional[int] = None, category: Optional[str] = None) -> Tuple[CatalogFood, ...]:
+        """获取符合餐饮类型和分类的候选美食"""
+        return self.buckets.get((meal_type, category), ())
+
+    def candidates(
+        self,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> Tuple[CatalogFood, ...]:
+        """获取符合全部筛选条件的候选美食"""
+        if min_price is None and max_price is None:
+            return self.bucket(meal_type, category)
+        index = self.price_buckets.get((meal_type, category))
+        if index is None:
+            return ()
+        lo, hi = index.range(min_price, max_price)
+        return index.foods[lo:hi]
+
+    def count(
+        self,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> int:
+        """统计符合筛选条件的候选美食数量"""
+        if min_price is None and max_price is None:
+            return len(self.bucket(meal_type, category))
+        index = self.price_buckets.get((meal_type, category))
+        if index is None:
+            return 0
+        lo, hi = index.range(min_price, max_price)
+        return hi - lo
+
+    @property
+    def categories(self) -> List[str]:
+        """目录中出现的全部分类"""
+        return sorted(category for meal_type, category in self.buckets if meal_type is None and category is not None)
+
+    def facets(
+        self,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None,
+        price_edges: Tuple[Decimal, ...] = ()
+    ) -> dict:
+        """
+        统计各筛选维度的候选美食数量（用于筛选界面显示数量、置灰无结果的选项）
+
+        每个维度的计数应用其他维度的筛选条件、不应用本维度的条件，
+        例如分类计数表示"当前餐饮类型和价格区间下选择该分类能得到的美食数"。
+        价格区间与筛选参数一样两端都包含，计数与选择该区间后的结果一致（相邻区间在边界价格上会重复计数）
+        """
+        index = self.price_buckets.get((meal_type, category))
+        priced = index.prices if index is not None else ()
+        bounds = (None,) + tuple(price_edges) + (None,)
+
+        return {
+            "total": self.count(meal_type, min_price, max_price, category),
+            "meal_types": [
+                {"value": value, "count": self.count(value, min_price, max_price, category)}
+                for value in (1, 2, 3, 4)
+            ],
+            "categories": [
+                {"value": value, "count": self.count(meal_type, min_price, max_price, value)}
+                for value in self.categories
+            ],
+            "prices": {
+                "min": priced[0] if priced else None,
+                "max": priced[-1] if priced else None,
+                "no_price": len(self.bucket(meal_type, category)) - len(priced),
+                "ranges": [
+                    {
+                        "min": low,
+                        "max": high,
+                        # 没有分界时只有一个不限价格的区间，与其他区间一样只统计有价格的美食
+                        "count": len(priced) if low is None and high is None
+                        else self.count(meal_type, low, high, category),
+                    }
+                    for low, high in zip(bounds, bounds[1:])
+                ],
+            },
+        }
+
+    def sample(
+        self,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> Optional[CatalogFood]:
+        """在候选美食中均匀随机取一条：两次二分查找加一次随机偏移，不复制候选列表"""
+        if min_price is None and max_price is None:
+            foods = self.bucket(meal_type, category)
+            return random.choice(foods) if foods else None
+        index = self.price_buckets.get((meal_type, category))
+        if index is None:
+            return None
+        lo, hi = index.range(min_price, max_price)
+        if lo >= hi:
+            return None
+        return index.foods[random.randrange(lo, hi)]
+
+    def sample_many(
+        self,
+        k: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> List[CatalogFood]:
+        """在候选美食中不放回地均匀随机取至多 k 条，只按下标采样，不复制候选列表"""
+        if min_price is None and max_price is None:
+            foods = self.bucket(meal_type, category)
+            lo, hi = 0, len(foods)
+        else:
+            index = self.price_buckets.get((meal_type, category))
+            if index is None:
+                return []
+            foods = index.foods
+            lo, hi = index.range(min_price, max_price)
+        return [foods[i] for i in random.sample(range(lo, hi), min(k, hi - lo))]
+
+
+class FoodCatalog:
+    """进程内美食目录缓存"""
+
+    def __init__(self, check_interval: float, max_age: float):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        # 进行中的异步刷新，冷启动时并发请求共同等待
+        self._refresh_task: Optional[asyncio.Task] = None
+        # (美食ID, 快照版本) -> 序列化好的 FoodResponse JSON，加载新快照时清空
+        self._payloads: Dict[Tuple[int, str], RawJSON] = {}
+
+    @staticmethod
+    def _fingerprint_statement():
+        """目录指纹：foods 和 food_tombstones 的最大变更序号（均有索引，不扫表）"""
+        return select(
+            select(func.max(Food.version)).scalar_subquery(),
+            select(func.max(FoodTombstone.version)).scalar_subquery(),
+        )
+
+    @staticmethod
+    def _fingerprint(db: Session) -> Tuple:
+        return tuple(db.execute(FoodCatalog._fingerprint_statement()).one())
+
+    @staticmethod
+    def _load_statement():
+        """
+        快照加载语句
+
+        美食和墓碑在同一条语句中读取（READ COMMITTED 下每条语句各自取数据库快照），
+        保证两者来自同一时刻；指纹也由读到的数据计算，增量同步水位不会超过快照实际包含的修改
+        """
+        live = select(*CATALOG_COLUMNS, Food.version, literal(False).label("deleted"))
+        deleted = select(
+            FoodTombstone.food_id, *(null() for _ in CATALOG_COLUMNS[1:]),
+            FoodTombstone.version, literal(True).label("deleted"),
+        )
+        return union_all(live, deleted)
+
+    @staticmethod
+    def _load(db: Session) -> CatalogSnapshot:
+        """加载快照"""
+        return FoodCatalog._build(db.execute(FoodCatalog._load_statement()).all())
+
+    @staticmethod
+    def _build(rows) -> CatalogSnapshot:
+        """由 _load_statement 读到的行构建快照：排序、计算版本并预建索引（纯 CPU，不访问数据库）"""
+        tombstones = [(row[0], row[-2]) for row in rows if row[-1]]
+        rows = sorted((row[:-1] for row in rows if not row[-1]), key=lambda row: row[0])
+        fingerprint = (
+            max((row[-1] for row in rows), default=None),
+            max((version for _, version in tombstones), default=None),
+        )
+
+        foods = tuple(CatalogFood(*row[:-1]) for row in rows)
+        by_id = {food.id: food for food in foods}
+        digest = hashlib.sha1()
+        for food in foods:
+            digest.update(repr(tuple(food.__dict__.values())).encode("utf-8"))
+
+        buckets: Dict[BucketKey, List[CatalogFood]] = {}
+        for food in foods:
+            # meal_type 为空的美食只属于"不限餐饮类型"的桶，用集合去重
+            for key in {
+                (None, None),
+                (food.meal_type, None),
+                (None, food.category),
+                (food.meal_type, food.category),
+            }:
+                buckets.setdefault(key, []).append(food)
+
+        price_buckets: Dict[BucketKey, PriceIndex] = {}
+        for key, bucket in buckets.items():
+            priced = sorted((food for food in bucket if food.price is not None), key=lambda food: food.price)
+            price_buckets[key] = PriceIndex(
+                prices=tuple(food.price for food in priced),
+                foods=tuple(priced),
+            )
+
+        changes = [CatalogChange(row[-1], food.id, food) for row, food in zip(rows, foods)]
+        # 同一 ID 重新插入后以现存的美食为准
+        changes.extend(
+            CatalogChange(version, food_id, None) for food_id, version in tombstones if food_id not in by_id
+        )
+        changes.sort(key=lambda change: (change.version, change.food_id))
+
+        return CatalogSnapshot(
+            version=digest.hexdigest()[:16],
+            fingerprint=fingerprint,
+            foods=foods,
+            by_id=by_id,
+            buckets={key: tuple(bucket) for key, bucket in buckets.items()},
+            price_buckets=price_buckets,
+            sync_version=changes[-1].version if changes else 0,
+            changes=tuple(changes),
+            change_versions=tuple(change.version for change in changes),
+        )
+
+    def invalidate(self) -> None:
+        """标记快照失效，下次访问时重新检查并加载"""
+        self._dirty = True
+
+    def peek(self) -> Optional[CatalogSnapshot]:
+        """无需刷新时返回当前快照，需要检查或加载时返回 None（不访问数据库）"""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._dirty and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+        return None
+
+    def get_snapshot(self, db: Session) -> CatalogSnapshot:
+        """
+        获取当前快照，必要时刷新
+
+        检查间隔内直接返回内存快照，不访问数据库。
+        刷新时不阻塞等待锁：其他线程或协程正在刷新时直接返回旧快照，
+        这样在 AsyncSession.run_sync 的 greenlet 中调用也不会卡住事件循环
+        """
+        snapshot = self.peek()
+        if snapshot is not None:
+            return snapshot
+
+        if not self._lock.acquire(blocking=False):
+            if self._snapshot is not None:
+                return self._snapshot
+            # 首次加载时没有旧快照可用，直接自行加载一份
+            return self._load(db)
+
+        try:
+            snapshot = self._snapshot
+            now = time.monotonic()
+            self._dirty = False
+            fingerprint = self._fingerprint(db)
+            if self._is_stale(snapshot, fingerprint, now):
+                snapshot = self._load(db)
+                self._install(snapshot, now)
+            self._checked_at = now
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def _is_stale(self, snapshot: Optional[CatalogSnapshot], fingerprint: Tuple, now: float) -> bool:
+        return snapshot is None or snapshot.fingerprint != fingerprint or now - self._loaded_at >= self.max_age
+
+    def _install(self, snapshot: CatalogSnapshot, now: float) -> None:
+        if self._snapshot is None or snapshot.version != self._snapshot.version:
+            self._payloads = {}
+        self._snapshot = snapshot
+        self._loaded_at = now
+
+    async def _refresh_async(self) -> CatalogSnapshot:
+        """
+        异步刷新快照：查询通过 asyncpg 异步执行，排序、计算版本和建索引放到线程池，不阻塞事件循环
+
+        使用独立的短会话，不依赖发起刷新的请求（该请求被取消时其他等待者仍能拿到结果）
+        """
+        async with AsyncSessionLocal() as db:
+            if not self._lock.acquire(blocking=False):
+                # 同步代码正在刷新：有旧快照时直接返回，首次加载时自行加载一份
+                if self._snapshot is not None:
+                    return self._snapshot
+                rows = (await db.execute(self._load_statement())).all()
+                await db.rollback()
+                return await run_in_threadpool(self._build, rows)
+
+            try:
+                snapshot = self._snapshot
+                now = time.monotonic()
+                self._dirty = False
+                fingerprint = tuple((await db.execute(self._fingerprint_statement())).one())
+                if self._is_stale(snapshot, fingerprint, now):
+                    rows = (await db.execute(self._load_statement())).all()
+                    await db.rollback()  # 建索引前归还连接
+                    snapshot = await run_in_threadpool(self._build, rows)
+                    self._install(snapshot, now)
+                self._checked_at = now
+                return snapshot
+            finally:
+                self._lock.release()
+
+    async def get_snapshot_async(self) -> CatalogSnapshot:
+        """
+        get_snapshot 的异步版本
+
+        无需刷新时直接返回内存快照，不访问数据库。需要刷新时同一时刻只有一次刷新：
+        发起刷新的请求等待其完成；其他请求有旧快照时直接返回旧快照，
+        首次加载时没有旧快照，则一起等待这一次加载，不会各自整表加载
+        """
+        snapshot = self.peek()
+        if snapshot is not None:
+            return snapshot
+
+        task = self._refresh_task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            if self._snapshot is not None:
+                return self._snapshot
+        else:
+            task = self._refresh_task = asyncio.create_task(self._refresh_async())
+        # shield：等待的请求被取消时不中断共享的刷新
+        return await asyncio.shield(task)
+
+    def food_payload(self, food) -> RawJSON:
+        """
+        获取美食的 FoodResponse JSON 片段
+
+        food 可以是 CatalogFood 或 Food ORM 对象。与当前快照中同 ID 的条目内容一致时，
+        使用按 (美食ID, 快照版本) 缓存的序列化结果；快照未加载或已过时则直接序列化，不写入缓存
+        """
+        if not isinstance(food, CatalogFood):
+            food = CatalogFood(*(getattr(food, attribute.key) for attribute in CATALOG_COLUMNS))
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.by_id.get(food.id) != food:
+            return RawJSON(dumps(food))
+
+        key = (food.id, snapshot.version)
+        payload = self._payloads.get(key)
+        if payload is None:
+            # CatalogFood 的字段与 FoodResponse 一致，orjson 直接按字段顺序序列化 dataclass
+            payload = RawJSON(dumps(food))
+            self._payloads[key] = payload
+        return payload
+
+
+food_catalog = FoodCatalog(
+    check_interval=settings.CATALOG_CHECK_INTERVAL,
+    max_age=settings.CATALOG_MAX_AGE,
+)
+
+
+@event.listens_for(Food, "after_insert")
+@event.listens_for(Food, "after_update")
+@event.listens_for(Food, "after_delete")
+def _mark_foods_changed(mapper, connection, target) -> None:
+    """记录会话中修改过美食，提交后再让快照失效，避免加载到未提交的数据"""
+    session = object_session(target)
+    if session is not None:
+        session.info["foods_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session) -> None:
+    if session.info.pop("foods_changed", False):
+        food_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_foods_changed(session) -> None:
+    session.info.pop("foods_changed", None)
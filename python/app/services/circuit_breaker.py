@@ -0,0 +1,138 @@
+"""
+熔断器模块
+
+为外部依赖（如微信接口）提供熔断保护和调用指标统计：
+1. closed    : 正常放行，按最近 window 次调用统计失败率
+2. open      : 失败率超过阈值后熔断，open_seconds 秒内直接快速失败，不再请求外部服务
+3. half_open : 熔断时间结束后放行少量试探请求，成功则恢复 closed，失败则重新 open
+"""
+
+import time
+from collections import deque
+from typing import Deque, Optional
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被快速拒绝"""
+
+
+class CircuitBreaker:
+    """基于滑动窗口失败率的熔断器（单进程、单事件循环内使用）"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        open_seconds: float,
+        half_open_calls: int = 1,
+        latency_samples: int = 1000
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = self.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True 表示失败
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # 指标
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+
+    def before_call(self) -> None:
+        """
+        请求外部服务前调用
+
+        Raises:
+            CircuitOpenError: 熔断打开或半开试探名额已满时抛出
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.total_rejected += 1
+                raise CircuitOpenError(f"{self.name} 熔断中")
+            self.state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_calls:
+                self.total_rejected += 1
+                raise CircuitOpenError(f"{self.name} 熔断试探中")
+            self._half_open_in_flight += 1
+
+    def release(self) -> None:
+        """
+        调用被取消、没有结果时调用：不计入成功或失败，只归还半开状态下占用的试探名额
+
+        每次 before_call 成功后必须且只能调用 record_success / record_failure / release 之一，
+        否则半开试探名额不会归还，熔断器会一直拒绝请求
+        """
+        if self.state == self.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        """记录一次成功调用（latency 单位：秒）"""
+        self.total_calls += 1
+        self._latencies.append(latency)
+        if self.state == self.HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append(False)
+
+    def record_failure(self, latency: float) -> None:
+        """记录一次失败调用（latency 单位：秒）"""
+        self.total_calls += 1
+        self.total_failures += 1
+        self._latencies.append(latency)
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(True)
+        if len(self._outcomes) >= self.min_calls and self.current_failure_rate() >= self.failure_rate:
+            self._open()
+
+    def current_failure_rate(self) -> float:
+        """滑动窗口内的失败率"""
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self._outcomes.clear()
+        self._half_open_in_flight = 0
+
+    def _latency_percentile(self, percentile: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * percentile))] * 1000, 3)
+
+    def metrics(self) -> dict:
+        """熔断器状态和调用指标（延迟单位：毫秒，基于最近的调用样本）"""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": round(self.current_failure_rate(), 4),
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "latency_p50_ms": self._latency_percentile(0.5),
+            "latency_p99_ms": self._latency_percentile(0.99),
+        }
@@ -1,24 +1,28 @@
-from datetime import datetime, date, timezone
+from datetime import datetime, date
 from typing import List, Optional
 from decimal import Decimal
+import base64
 import random
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, Query, contains_eager
+from sqlalchemy import Integer, column, func, insert, literal, select, true, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.draw_record import DrawRecord
 from app.models.food import Food
+from app.models.user_daily_quota import UserDailyQuota
+from app.services.catalog import CATALOG_COLUMNS, CatalogFood, food_catalog
 from app.config import settings
 
 
 class DrawService:
     @staticmethod
     def get_today_draw_count(db: Session, user_id: int) -> int:
-        """获取用户今日已抽取次数"""
-        today = date.today()
-        count = db.query(DrawRecord).filter(
-            DrawRecord.user_id == user_id,
-            func.date(DrawRecord.drawn_at) == today
-        ).count()
-        return count
+        """获取用户今日已抽取次数（每日计数表的单行主键查询）"""
+        used = db.query(UserDailyQuota.used).filter(
+            UserDailyQuota.user_id == user_id,
+            UserDailyQuota.day == date.today()
+        ).scalar()
+        return used or 0
 
     @staticmethod
     def get_remaining_times(db: Session, user_id: int) -> int:
@@ -27,29 +31,14 @@ class DrawService:
         return max(0, settings.DAILY_FREE_TIMES - used_times)
 
     @staticmethod
-    def can_draw(db: Session, user_id: int) -> bool:
-        """检查用户今日是否还能抽取"""
-        return DrawService.get_remaining_times(db, user_id) > 0
-
-    @staticmethod
-    def get_random_food(
-        db: Session,
+    def _filter_foods(
+        query: Query,
         meal_type: Optional[int] = None,
         min_price: Optional[Decimal] = None,
         max_price: Optional[Decimal] = None,
         category: Optional[str] = None
-    ) -> Optional[Food]:
-        """
-        随机获取一条美食
-
-        Args:
-            meal_type: 餐饮类型 1=早餐, 2=午餐, 3=晚餐, 4=夜宵
-            min_price: 最小价格
-            max_price: 最大价格
-            category: 美食分类
-        """
-        query = db.query(Food)
-
+    ) -> Query:
+        """为 foods 查询追加筛选条件（数据库采样策略使用）"""
         # 按餐饮类型筛选
         if meal_type is not None:
             query = query.filter(Food.meal_type == meal_type)
@@ -66,19 +55,196 @@ class DrawService:
         if category is not None:
             query = query.filter(Food.category == category)
 
-        foods = query.all()
-        if not foods:
+        return query
+
+    @staticmethod
+    def _sample_by_offset(db: Session, **filters) -> Optional[CatalogFood]:
+        """先统计候选数量，再按主键排序随机 OFFSET 取一行"""
+        total = DrawService._filter_foods(db.query(func.count(Food.id)), **filters).scalar()
+        if not total:
             return None
-        return random.choice(foods)
+        row = DrawService._filter_foods(db.query(*CATALOG_COLUMNS), **filters).order_by(
+            Food.id
+        ).offset(random.randrange(total)).limit(1).first()
+        return CatalogFood(*row) if row else None
+
+    @staticmethod
+    def _sample_many_by_offset(db: Session, k: int, **filters) -> List[CatalogFood]:
+        """先统计候选数量，再取 k 个互不相同的随机 OFFSET，每个 OFFSET 取一行"""
+        total = DrawService._filter_foods(db.query(func.count(Food.id)), **filters).scalar()
+        query = DrawService._filter_foods(db.query(*CATALOG_COLUMNS), **filters).order_by(Food.id)
+        foods = []
+        for offset in random.sample(range(total or 0), min(k, total or 0)):
+            row = query.offset(offset).limit(1).first()
+            if row:
+                foods.append(CatalogFood(*row))
+        return foods
+
+    @staticmethod
+    def _sample_many_by_id_probe(db: Session, k: int, **filters) -> List[CatalogFood]:
+        """
+        在 foods 表的 [最小ID, 最大ID] 区间内批量随机探测主键，不放回地取至多 k 条候选
+
+        每轮生成一批互不相同的随机 ID，用一条 id IN (...) 主键查询取回其中符合筛选条件的美食，
+        每个候选被探测到的概率相同，结果仍是均匀的。最多探测 DRAW_ID_PROBE_ATTEMPTS 轮，每轮探测数量翻倍，
+        耗时只与 k 有关、与候选数量无关；ID 稀疏或筛选条件很严格时可能少于 k 条
+        """
+        # 不带筛选条件的最小/最大 ID 只需读主键索引两端
+        min_id, max_id = db.query(func.min(Food.id), func.max(Food.id)).one()
+        if min_id is None or k <= 0:
+            return []
+        span = range(min_id, max_id + 1)
+        foods = {}
+        for attempt in range(settings.DRAW_ID_PROBE_ATTEMPTS):
+            wanted = k - len(foods)
+            if wanted <= 0:
+                break
+            # 每轮探测数量翻倍，筛选条件较严格（命中率低）时也能在几轮内取够
+            probes = random.sample(span, min(len(span), wanted * 4 << attempt))
+            rows = DrawService._filter_foods(
+                db.query(*CATALOG_COLUMNS).filter(Food.id.in_(probes)), **filters
+            ).all()
+            random.shuffle(rows)
+            for row in rows:
+                if len(foods) < k:
+                    foods.setdefault(row.id, CatalogFood(*row))
+        return list(foods.values())
+
+    @staticmethod
+    def _sample_by_id_probe(db: Session, **filters) -> Optional[CatalogFood]:
+        """
+        在候选美食的 [最小ID, 最大ID] 区间内随机探测主键
+
+        每次探测对区间内每个候选命中概率相同，命中即为均匀抽样；
+        ID 稀疏导致多次未命中时回退到 offset 策略
+        """
+        min_id, max_id = DrawService._filter_foods(
+            db.query(func.min(Food.id), func.max(Food.id)), **filters
+        ).one()
+        if min_id is None:
+            return None
+        for _ in range(settings.DRAW_ID_PROBE_ATTEMPTS):
+            row = DrawService._filter_foods(
+                db.query(*CATALOG_COLUMNS).filter(Food.id == random.randint(min_id, max_id)),
+                **filters
+            ).first()
+            if row:
+                return CatalogFood(*row)
+        return DrawService._sample_by_offset(db, **filters)
+
+    @staticmethod
+    def get_random_food(
+        db: Session,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> Optional[CatalogFood]:
+        """
+        随机获取一条美食
+
+        默认在进程内美食目录快照的索引上采样，不会逐次查询 foods 表，也不会复制候选列表；
+        DRAW_SAMPLING 配置为 offset / id_probe 时在数据库内采样，只传输选中的一行
+
+        Args:
+            meal_type: 餐饮类型 1=早餐, 2=午餐, 3=晚餐, 4=夜宵
+            min_price: 最小价格
+            max_price: 最大价格
+            category: 美食分类
+        """
+        filters = dict(meal_type=meal_type, min_price=min_price, max_price=max_price, category=category)
+        if settings.DRAW_SAMPLING == "offset":
+            return DrawService._sample_by_offset(db, **filters)
+        if settings.DRAW_SAMPLING == "id_probe":
+            return DrawService._sample_by_id_probe(db, **filters)
+        return food_catalog.get_snapshot(db).sample(**filters)
 
     @staticmethod
-    def create_draw_record(db: Session, user_id: int, food_id: int) -> DrawRecord:
-        """创建抽取记录"""
-        record = DrawRecord(user_id=user_id, food_id=food_id)
-        db.add(record)
+    def get_random_foods(
+        db: Session,
+        n: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> List[CatalogFood]:
+        """
+        不放回地随机获取至多 n 条互不相同的美食
+
+        数据库采样策略（offset / id_probe）下按互不相同的随机 OFFSET 逐条读取
+        """
+        filters = dict(meal_type=meal_type, min_price=min_price, max_price=max_price, category=category)
+        if settings.DRAW_SAMPLING in ("offset", "id_probe"):
+            return DrawService._sample_many_by_offset(db, n, **filters)
+        return food_catalog.get_snapshot(db).sample_many(n, **filters)
+
+    @staticmethod
+    def get_distractors(
+        db: Session,
+        exclude_id: int,
+        k: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> List[CatalogFood]:
+        """
+        从同一候选集合中不放回地取至多 k 道陪衬美食（不含已抽中的美食），供抽取动画使用
+
+        catalog 策略下只按下标采样 k + 1 个位置；数据库采样策略下批量探测主键，
+        不逐条 OFFSET。两种方式耗时都与候选集合大小无关
+        """
+        filters = dict(meal_type=meal_type, min_price=min_price, max_price=max_price, category=category)
+        if settings.DRAW_SAMPLING in ("offset", "id_probe"):
+            foods = DrawService._sample_many_by_id_probe(db, k + 1, **filters)
+        else:
+            foods = food_catalog.get_snapshot(db).sample_many(k + 1, **filters)
+        return [food for food in foods if food.id != exclude_id][:k]
+
+    @staticmethod
+    def create_draw_records_within_quota(
+        db: Session, user_id: int, food_ids: List[int]
+    ) -> tuple[List[DrawRecord], int]:
+        """
+        按美食数量消耗今日抽取次数并批量写入抽取记录，一条语句完成
+
+        每日计数表上执行 INSERT ... ON CONFLICT DO UPDATE ... WHERE used + N <= 每日次数 RETURNING used，
+        计数行的行锁保证同一用户的并发抽取不会超出每日次数；计数成功时才批量插入全部抽取记录，
+        剩余次数不足时一条也不写入
+
+        返回: (抽取记录列表，次数不足时为空列表, 今日已用次数)
+        """
+        times = len(food_ids)
+        if times == 0 or times > settings.DAILY_FREE_TIMES:
+            return [], DrawService.get_today_draw_count(db, user_id)
+
+        quota = pg_insert(UserDailyQuota).values(user_id=user_id, day=date.today(), used=times)
+        quota = quota.on_conflict_do_update(
+            index_elements=[UserDailyQuota.user_id, UserDailyQuota.day],
+            set_={"used": UserDailyQuota.used + times},
+            where=UserDailyQuota.used + times <= settings.DAILY_FREE_TIMES
+        ).returning(UserDailyQuota.used).cte("quota")
+        food_values = values(column("food_id", Integer), name="drawn_foods").data(
+            [(food_id,) for food_id in food_ids]
+        )
+        inserted = insert(DrawRecord).from_select(
+            ["user_id", "food_id"],
+            select(literal(user_id), food_values.c.food_id).select_from(quota.join(food_values, true()))
+        ).returning(DrawRecord.id, DrawRecord.food_id, DrawRecord.drawn_at).cte("inserted")
+        rows = db.execute(
+            select(quota.c.used, inserted.c.id, inserted.c.food_id, inserted.c.drawn_at).select_from(
+                quota.join(inserted, true())
+            )
+        ).all()
         db.commit()
-        db.refresh(record)
-        return record
+
+        if not rows:
+            return [], DrawService.get_today_draw_count(db, user_id)
+        records = [
+            DrawRecord(id=row.id, user_id=user_id, food_id=row.food_id, drawn_at=row.drawn_at)
+            for row in rows
+        ]
+        return records, rows[0].used
 
     @staticmethod
     def draw(
@@ -88,37 +254,216 @@ class DrawService:
         min_price: Optional[Decimal] = None,
         max_price: Optional[Decimal] = None,
         category: Optional[str] = None
-    ) -> tuple[Optional[DrawRecord], str, int]:
+    ) -> tuple[Optional[DrawRecord], Optional[CatalogFood], str, int]:
         """
         执行抽取操作
 
+        先在美食目录上选出美食，再在一个事务内完成次数检查与记录写入，
+        剩余次数由写入语句返回的计数算出，无需再次查询
+
         Args:
             meal_type: 餐饮类型 1=早餐, 2=午餐, 3=晚餐, 4=夜宵
             min_price: 最小价格
             max_price: 最大价格
             category: 美食分类
 
-        返回: (抽取记录, 消息, 剩余次数)
+        返回: (抽取记录, 抽中的美食, 消息, 剩余次数)
         """
-        # 检查是否还有抽取次数
-        if not DrawService.can_draw(db, user_id):
-            return None, "今日抽取次数已用完，明天再来吧！", 0
-
         # 随机获取美食
         food = DrawService.get_random_food(db, meal_type, min_price, max_price, category)
         if not food:
             remaining = DrawService.get_remaining_times(db, user_id)
-            return None, "暂无符合条件的美食数据，请调整筛选条件", remaining
+            if remaining <= 0:
+                return None, None, "今日抽取次数已用完，明天再来吧！", 0
+            return None, None, "暂无符合条件的美食数据，请调整筛选条件", remaining
+
+        # 检查抽取次数并创建抽取记录
+        records, used_times = DrawService.create_draw_records_within_quota(db, user_id, [food.id])
+        if not records:
+            return None, None, "今日抽取次数已用完，明天再来吧！", 0
+
+        remaining = max(0, settings.DAILY_FREE_TIMES - used_times)
+        return records[0], food, "抽取成功！今天就吃这个吧~", remaining
+
+    @staticmethod
+    def draw_batch(
+        db: Session,
+        user_id: int,
+        n: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> tuple[List[DrawRecord], List[CatalogFood], str, int]:
+        """
+        批量抽取 N 道互不相同的美食
+
+        每道美食消耗一次抽取次数；剩余次数不足 N 次时整批失败，不消耗次数。
+        候选美食不足 N 道时只抽取现有的候选，并只消耗相应次数
+
+        返回: (抽取记录列表, 抽中的美食列表, 消息, 剩余次数)
+        """
+        foods = DrawService.get_random_foods(db, n, meal_type, min_price, max_price, category)
+        if not foods:
+            remaining = DrawService.get_remaining_times(db, user_id)
+            if remaining <= 0:
+                return [], [], "今日抽取次数已用完，明天再来吧！", 0
+            return [], [], "暂无符合条件的美食数据，请调整筛选条件", remaining
 
-        # 创建抽取记录
-        record = DrawService.create_draw_record(db, user_id, food.id)
-        remaining = DrawService.get_remaining_times(db, user_id)
+        records, used_times = DrawService.create_draw_records_within_quota(
+            db, user_id, [food.id for food in foods]
+        )
+        remaining = max(0, settings.DAILY_FREE_TIMES - used_times)
+        if not records:
+            if remaining <= 0:
+                return [], [], "今日抽取次数已用完，明天再来吧！", 0
+            return [], [], f"今日剩余抽取次数不足 {len(foods)} 次，仅剩 {remaining} 次", remaining
 
-        return record, "抽取成功！今天就吃这个吧~", remaining
+        return records, foods, f"抽取成功！为你挑了 {len(foods)} 道美食~", remaining
 
     @staticmethod
-    def get_user_records(db: Session, user_id: int, limit: int = 30) -> List[DrawRecord]:
-        """获取用户的抽取记录"""
-        return db.query(DrawRecord).filter(
-            DrawRecord.user_id == user_id
-        ).order_by(DrawRecord.drawn_at.desc()).limit(limit).all()
+    def encode_records_cursor(record: DrawRecord) -> str:
+        """将抽取记录的 (drawn_at, id) 编码为分页游标"""
+        raw = f"{record.drawn_at.isoformat()}|{record.id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_records_cursor(cursor: str) -> tuple[datetime, int]:
+        """
+        解析分页游标
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            drawn_at, record_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(drawn_at), int(record_id)
+        except (UnicodeError, ValueError) as e:
+            raise ValueError("无效的分页游标") from e
+
+    @staticmethod
+    def get_user_records(
+        db: Session,
+        user_id: int,
+        limit: int = 30,
+        cursor: Optional[str] = None
+    ) -> tuple[List[DrawRecord], Optional[str]]:
+        """
+        获取用户的抽取记录（按 (drawn_at, id) 倒序的游标分页）
+
+        美食通过 JOIN 在同一条查询中加载，每页固定一次查询，与翻页深度无关
+
+        Args:
+            limit: 每页条数
+            cursor: 上一页返回的游标，为空时从最新记录开始
+
+        返回: (抽取记录列表, 下一页游标，没有更多记录时为 None)
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        query = db.query(DrawRecord).join(DrawRecord.food).options(
+            contains_eager(DrawRecord.food)
+        ).filter(DrawRecord.user_id == user_id)
+
+        if cursor:
+            drawn_at, record_id = DrawService.decode_records_cursor(cursor)
+            query = query.filter(
+                tuple_(DrawRecord.drawn_at, DrawRecord.id) < tuple_(drawn_at, record_id)
+            )
+
+        records = query.order_by(
+            DrawRecord.drawn_at.desc(), DrawRecord.id.desc()
+        ).limit(limit + 1).all()
+
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        return records, DrawService.encode_records_cursor(records[-1])
+
+
+class AsyncDrawService:
+    """
+    DrawService 的异步版本，供使用 AsyncSession 的 async def 路由调用
+
+    单条查询直接使用异步 API；多步事务复用 DrawService 的同步实现，
+    通过 AsyncSession.run_sync 在 greenlet 中执行，底层 IO 仍由 asyncpg 异步完成。
+    run_sync 在事件循环线程上运行，catalog 采样策略下先异步刷新美食目录快照，
+    之后同步实现中的 get_snapshot 直接命中内存，不在事件循环上整表加载
+    """
+
+    @staticmethod
+    async def _prepare_catalog() -> None:
+        if settings.DRAW_SAMPLING == "catalog":
+            await food_catalog.get_snapshot_async()
+
+    @staticmethod
+    async def get_today_draw_count(db: AsyncSession, user_id: int) -> int:
+        """获取用户今日已抽取次数"""
+        used = await db.scalar(
+            select(UserDailyQuota.used).where(
+                UserDailyQuota.user_id == user_id,
+                UserDailyQuota.day == date.today()
+            )
+        )
+        return used or 0
+
+    @staticmethod
+    async def get_remaining_times(db: AsyncSession, user_id: int) -> int:
+        """获取用户今日剩余抽取次数"""
+        used_times = await AsyncDrawService.get_today_draw_count(db, user_id)
+        return max(0, settings.DAILY_FREE_TIMES - used_times)
+
+    @staticmethod
+    async def draw(
+        db: AsyncSession,
+        user_id: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> tuple[Optional[DrawRecord], Optional[CatalogFood], str, int]:
+        """执行抽取操作，参见 DrawService.draw"""
+        await AsyncDrawService._prepare_catalog()
+        return await db.run_sync(DrawService.draw, user_id, meal_type, min_price, max_price, category)
+
+    @staticmethod
+    async def draw_batch(
+        db: AsyncSession,
+        user_id: int,
+        n: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> tuple[List[DrawRecord], List[CatalogFood], str, int]:
+        """批量抽取美食，参见 DrawService.draw_batch"""
+        await AsyncDrawService._prepare_catalog()
+        return await db.run_sync(DrawService.draw_batch, user_id, n, meal_type, min_price, max_price, category)
+
+    @staticmethod
+    async def get_distractors(
+        db: AsyncSession,
+        exclude_id: int,
+        k: int,
+        meal_type: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        category: Optional[str] = None
+    ) -> List[CatalogFood]:
+        """获取陪衬美食，参见 DrawService.get_distractors"""
+        await AsyncDrawService._prepare_catalog()
+        return await db.run_sync(
+            DrawService.get_distractors, exclude_id, k, meal_type, min_price, max_price, category
+        )
+
+    @staticmethod
+    async def get_user_records(
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 30,
+        cursor: Optional[str] = None
+    ) -> tuple[List[DrawRecord], Optional[str]]:
+        """获取用户的抽取记录，参见 DrawService.get_user_records"""
+        return await db.run_sync(DrawService.get_user_records, user_id, limit, cursor)
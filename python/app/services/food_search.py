@@ -0,0 +1,302 @@
+"""
+美食搜索模块
+
+每个 worker 进程基于美食目录快照在内存中维护一份 n-gram 倒排索引，支持：
+1. 菜名子串匹配（如 "烧肉" -> 红烧肉）
+2. 全拼子串匹配（如 "hongshao" -> 红烧肉）
+3. 拼音首字母匹配（如 "hsr" -> 红烧肉）
+
+每个搜索键的所有 1~3 字符子串都建立倒排，查询不超过 3 个字符时一次字典查找即得结果，
+更长的查询对各 3-gram 的倒排求交集后再逐条校验子串。
+快照变化时复制上一版索引，只对内容变化的美食重新计算拼音和倒排，完成后整体替换；
+异步路由中建索引和搜索都在线程池执行，不阻塞事件循环，正在使用旧索引的搜索不受影响
+
+拼音优先使用 pypinyin 计算；未安装时退回到美食图片 seed（fake_food_generator 中
+中餐的 seed 即菜名全拼，如 hongshaorou），按菜名汉字数切分为拼音音节。
+seed 只能覆盖部分中餐，且个别 seed 与菜名读音不一致，生产环境应安装 pypinyin
+"""
+
+import asyncio
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.catalog import CatalogFood, CatalogSnapshot
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 未安装 pypinyin 时只能从图片 seed 推断拼音
+    lazy_pinyin = None
+
+
+# 倒排索引的最大 gram 长度
+MAX_GRAM = 3
+
+# 搜索键类型，数值越小排序越靠前
+FIELD_NAME = 0
+FIELD_PINYIN = 1
+
+# 全部拼音音节（不含声调），用于切分图片 seed
+PINYIN_SYLLABLES = frozenset("""
+a ai an ang ao
+ba bai ban bang bao bei ben beng bi bian biao bie bin bing bo bu
+ca cai can cang cao ce cen ceng cha chai chan chang chao che chen cheng chi chong chou chu
+chua chuai chuan chuang chui chun chuo ci cong cou cu cuan cui cun cuo
+da dai dan dang dao de dei den deng di dia dian diao die ding diu dong dou du duan dui dun duo
+e ei en eng er
+fa fan fang fei fen feng fo fou fu
+ga gai gan gang gao ge gei gen geng gong gou gu gua guai guan guang gui gun guo
+ha hai han hang hao he hei hen heng hong hou hu hua huai huan huang hui hun huo
+ji jia jian jiang jiao jie jin jing jiong jiu ju juan jue jun
+ka kai kan kang kao ke kei ken keng kong kou ku kua kuai kuan kuang kui kun kuo
+la lai lan lang lao le lei leng li lia lian liang liao lie lin ling liu lo long lou lu luan lue lun luo lv
+ma mai man mang mao me mei men meng mi mian miao mie min ming miu mo mou mu
+na nai nan nang nao ne nei nen neng ni nian niang niao nie nin ning niu nong nou nu nuan nue nuo nv
+o ou
+pa pai pan pang pao pei pen peng pi pian piao pie pin ping po pou pu
+qi qia qian qiang qiao qie qin qing qiong qiu qu quan que qun
+ran rang rao re ren reng ri rong rou ru rua ruan rui run ruo
+sa sai san sang sao se sen seng sha shai shan shang shao she shei shen sheng shi shou shu
+shua shuai shuan shuang shui shun shuo si song sou su suan sui sun suo
+ta tai tan tang tao te teng ti tian tiao tie ting tong tou tu tuan tui tun tuo
+wa wai wan wang wei wen weng wo wu
+xi xia xian xiang xiao xie xin xing xiong xiu xu xuan xue xun
+ya yan yang yao ye yi yin ying yo yong you yu yuan yue yun
+za zai zan zang zao ze zei zen zeng zha zhai zhan zhang zhao zhe zhei zhen zheng zhi zhong zhou
+zhu zhua zhuai zhuan zhuang zhui zhun zhuo zi zong zou zu zuan zui zun zuo
+""".split())
+MAX_SYLLABLE_LENGTH = max(len(syllable) for syllable in PINYIN_SYLLABLES)
+
+_HAN_RE = re.compile(r"[一-鿿]")
+# 查询和搜索键中忽略的字符：空白、隔音符、连字符
+_IGNORED_RE = re.compile(r"[\s'’\-_]+")
+
+
+def normalize(text: str) -> str:
+    """搜索键和查询的统一规范化：转小写并去掉空白、隔音符和连字符"""
+    return _IGNORED_RE.sub("", text).lower()
+
+
+def split_syllables(text: str, count: int) -> Optional[List[str]]:
+    """把连写的拼音恰好切分为 count 个音节，无法切分时返回 None（优先匹配较长的音节）"""
+    failed: Set[Tuple[int, int]] = set()
+
+    def split(start: int, remaining: int) -> Optional[List[str]]:
+        if start == len(text):
+            return [] if remaining == 0 else None
+        if remaining == 0 or (start, remaining) in failed:
+            return None
+        for end in range(min(len(text), start + MAX_SYLLABLE_LENGTH), start, -1):
+            if text[start:end] in PINYIN_SYLLABLES:
+                rest = split(end, remaining - 1)
+                if rest is not None:
+                    return [text[start:end]] + rest
+        failed.add((start, remaining))
+        return None
+
+    return split(0, count)
+
+
+def _image_seed(image_url: Optional[str]) -> Optional[str]:
+    """取出 picsum 图片地址中的 seed（/seed/<seed>/宽/高）"""
+    if not image_url:
+        return None
+    parts = urlparse(image_url).path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "seed":
+        return parts[1]
+    return None
+
+
+def food_syllables(food: CatalogFood) -> Optional[List[str]]:
+    """美食名称中汉字的拼音音节，无法确定时返回 None"""
+    han = "".join(_HAN_RE.findall(food.name))
+    if not han:
+        return None
+    if lazy_pinyin is not None:
+        return lazy_pinyin(han)
+    seed = _image_seed(food.image_url)
+    # 只接受纯字母的 seed：带连字符的多为英文名（如 tuna-sashimi），强行切分会得到错误的拼音
+    if seed is None or not seed.isalpha():
+        return None
+    return split_syllables(seed.lower(), len(han))
+
+
+def search_keys(food: CatalogFood) -> Tuple[Tuple[int, str], ...]:
+    """美食的搜索键：(键类型, 规范化后的文本)，包括名称、全拼和拼音首字母"""
+    keys = [(FIELD_NAME, normalize(food.name))]
+    syllables = food_syllables(food)
+    if syllables:
+        keys.append((FIELD_PINYIN, "".join(syllables)))
+        keys.append((FIELD_PINYIN, "".join(syllable[0] for syllable in syllables)))
+    return tuple((field, key) for field, key in keys if key)
+
+
+def _grams(key: str) -> Set[str]:
+    return {
+        key[start:start + size]
+        for size in range(1, MAX_GRAM + 1)
+        for start in range(len(key) - size + 1)
+    }
+
+
+def _rank(key: str, query: str) -> int:
+    """匹配程度：0=完全相同，1=前缀，2=子串，3=不匹配"""
+    if key == query:
+        return 0
+    if key.startswith(query):
+        return 1
+    return 2 if query in key else 3
+
+
+class FoodSearchIndex:
+    """美食搜索倒排索引（对应某个美食目录快照版本）"""
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.foods: Dict[int, CatalogFood] = {}
+        self.keys: Dict[int, Tuple[Tuple[int, str], ...]] = {}
+        self.postings: Dict[str, Set[int]] = {}
+
+    def copy(self) -> "FoodSearchIndex":
+        """复制索引（倒排集合逐个复制），在副本上更新不影响正在使用原索引的搜索"""
+        index = FoodSearchIndex()
+        index.version = self.version
+        index.foods = dict(self.foods)
+        index.keys = dict(self.keys)
+        index.postings = {gram: set(ids) for gram, ids in self.postings.items()}
+        return index
+
+    def _add(self, food: CatalogFood) -> None:
+        keys = search_keys(food)
+        self.foods[food.id] = food
+        self.keys[food.id] = keys
+        for _, key in keys:
+            for gram in _grams(key):
+                self.postings.setdefault(gram, set()).add(food.id)
+
+    def _remove(self, food_id: int) -> None:
+        self.foods.pop(food_id, None)
+        for _, key in self.keys.pop(food_id, ()):
+            for gram in _grams(key):
+                ids = self.postings.get(gram)
+                if ids is not None:
+                    ids.discard(food_id)
+                    if not ids:
+                        del self.postings[gram]
+
+    def update(self, snapshot: CatalogSnapshot) -> Tuple[int, int]:
+        """
+        同步到快照内容：只重建内容变化的美食
+
+        Returns:
+            (重新索引的美食数, 移除的美食数)
+        """
+        removed = [food_id for food_id in self.foods if food_id not in snapshot.by_id]
+        for food_id in removed:
+            self._remove(food_id)
+
+        changed = 0
+        for food in snapshot.foods:
+            if self.foods.get(food.id) != food:
+                self._remove(food.id)
+                self._add(food)
+                changed += 1
+
+        self.version = snapshot.version
+        return changed, len(removed)
+
+    def search(self, query: str, limit: int) -> List[CatalogFood]:
+        """
+        搜索美食，按匹配程度排序
+
+        排序依次比较：名称/拼音完全相同 > 前缀匹配 > 子串匹配，名称匹配优先于拼音匹配，
+        名称较短的优先，最后按 ID 升序
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        if len(query) <= MAX_GRAM:
+            candidates = self.postings.get(query, set())
+        else:
+            postings = sorted(
+                (self.postings.get(query[start:start + MAX_GRAM], set()) for start in range(len(query) - MAX_GRAM + 1)),
+                key=len,
+            )
+            candidates = set.intersection(*postings) if postings[0] else set()
+
+        ranked = []
+        for food_id in candidates:
+            rank, field = min((_rank(key, query), field) for field, key in self.keys[food_id])
+            if rank < 3:
+                food = self.foods[food_id]
+                ranked.append((rank, field, len(food.name), food_id, food))
+        ranked.sort(key=lambda item: item[:4])
+        return [item[-1] for item in ranked[:limit]]
+
+
+class FoodSearch:
+    """
+    进程内美食搜索，快照版本变化后首次搜索时增量更新索引
+
+    当前索引替换后不再修改，可以在多个线程中同时搜索
+    """
+
+    def __init__(self):
+        self._index = FoodSearchIndex()
+        self._lock = threading.Lock()
+        # 进行中的异步建索引：(快照版本, 任务)，同一版本的搜索共同等待
+        self._building: Optional[Tuple[str, asyncio.Future]] = None
+
+    def get_index(self, snapshot: CatalogSnapshot) -> FoodSearchIndex:
+        """获取与快照对应的索引，需要时复制当前索引增量更新后整体替换（CPU 密集，不要在事件循环中调用）"""
+        index = self._index
+        if index.version == snapshot.version:
+            return index
+        with self._lock:
+            index = self._index
+            if index.version != snapshot.version:
+                index = index.copy()
+                index.update(snapshot)
+                self._index = index
+            return index
+
+    async def get_index_async(self, snapshot: CatalogSnapshot) -> FoodSearchIndex:
+        """get_index 的异步版本：在线程池中建索引，同一快照版本只建一次"""
+        index = self._index
+        if index.version == snapshot.version:
+            return index
+        building = self._building
+        if (
+            building is None
+            or building[0] != snapshot.version
+            or building[1].done()
+            or building[1].get_loop() is not asyncio.get_running_loop()
+        ):
+            building = (snapshot.version, asyncio.ensure_future(run_in_threadpool(self.get_index, snapshot)))
+            self._building = building
+        # shield：等待的请求被取消时不中断共享的建索引
+        return await asyncio.shield(building[1])
+
+    def search(self, snapshot: CatalogSnapshot, query: str, limit: int) -> List[CatalogFood]:
+        return self.get_index(snapshot).search(query, limit)
+
+    async def search_async(self, snapshot: CatalogSnapshot, query: str, limit: int) -> List[CatalogFood]:
+        """异步搜索：建索引和搜索都在线程池执行"""
+        index = await self.get_index_async(snapshot)
+        return await run_in_threadpool(index.search, query, limit)
+
+    def metrics(self) -> dict:
+        """索引大小"""
+        index = self._index
+        return {
+            "version": index.version,
+            "foods": len(index.foods),
+            "grams": len(index.postings),
+        }
+
+
+food_search = FoodSearch()
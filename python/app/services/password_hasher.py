@@ -0,0 +1,95 @@
+"""
+密码哈希模块
+
+pbkdf2_sha256 故意设计为 CPU 密集，注册/登录高峰时在请求线程中直接计算会占满线程池和 CPU。
+这里把哈希和校验放到有界的进程池中执行：
+1. 进程池大小为 PASSWORD_HASH_WORKERS，0 表示不使用进程池，改在默认线程池中计算
+2. 同时排队的哈希任务不超过 PASSWORD_HASH_MAX_PENDING 个，超出的请求在事件循环中等待，不会无限堆积
+3. 迭代次数由 PASSWORD_HASH_ROUNDS 配置，登录校验通过时若旧哈希的迭代次数与配置不同，顺带生成新哈希
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+
+@lru_cache(maxsize=8)
+def build_context(rounds: int) -> CryptContext:
+    """
+    创建指定迭代次数的 CryptContext
+
+    使用 pbkdf2_sha256 替代 bcrypt（bcrypt 5.0.0 与 passlib 不兼容），不依赖外部库。
+    最小/最大迭代次数都设为 rounds，迭代次数不同的旧哈希会被判定为需要更新
+    """
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+# 以下两个函数在子进程中执行，必须是模块级函数以便序列化
+
+def hash_password(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """校验密码，返回 (是否正确, 需要更新时的新哈希)"""
+    return build_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """在有界进程池中计算密码哈希"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn 启动的子进程不继承父进程的线程、锁和数据库连接
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        """计算密码哈希"""
+        return await self._run(hash_password, password, settings.PASSWORD_HASH_ROUNDS)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """校验密码，返回 (是否正确, 需要更新时的新哈希)"""
+        return await self._run(verify_and_update, password, hashed_password, settings.PASSWORD_HASH_ROUNDS)
+
+    def shutdown(self) -> None:
+        """关闭进程池（应用关闭时调用）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,83 @@
+"""
+JWT 校验结果缓存模块
+
+小程序在 Token 有效期（默认 7 天）内每个请求都携带同一个 Token，
+每次都完整执行 jwt.decode（base64 解码、HMAC 校验、JSON 解析、声明校验）是重复劳动。
+这里缓存已校验通过的 Token：
+1. 以 Token 的 SHA-256 摘要为键，不在内存中保存 Token 原文
+2. 条目记录校验时使用的 SECRET_KEY 和 ALGORITHM，密钥轮换后旧条目不再命中
+3. 严格按 payload 中的 exp 过期，过期后不会再返回缓存的 payload；没有 exp 的 Token 不缓存
+4. 只缓存校验通过的 Token，无效 Token 不占用缓存
+5. 超过 TOKEN_CACHE_MAX_SIZE 条时淘汰最久未使用的条目
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import settings
+
+
+class TokenCache:
+    """已校验 JWT 的 LRU 缓存"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # 摘要 -> (过期时间戳, (SECRET_KEY, ALGORITHM), payload)
+        self._entries: "OrderedDict[bytes, Tuple[float, Tuple[str, str], dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str, secret_key: str, algorithm: str) -> Optional[dict]:
+        """获取已校验的 payload，不存在、已过期或密钥不一致时返回 None"""
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, key, payload = entry
+            if time.time() >= expires_at or key != (secret_key, algorithm):
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+        return dict(payload)
+
+    def set(self, token: str, secret_key: str, algorithm: str, payload: dict) -> None:
+        """缓存校验通过的 payload"""
+        exp = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (float(exp), (secret_key, algorithm), dict(payload))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        """缓存大小和命中率（当前 worker 进程）"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
@@ -0,0 +1,109 @@
+"""
+已登录用户缓存模块
+
+每个需要登录的请求都要根据 Token 中的用户ID查询 users 表，而用户信息极少变化。
+这里在进程内按用户ID缓存用户信息（TTL + LRU）：
+1. 缓存条目是与 ORM 解耦的只读对象，可跨会话、跨线程共享
+2. 条目超过 USER_CACHE_TTL 秒后失效，重新查询数据库
+3. 超过 USER_CACHE_MAX_SIZE 条时淘汰最久未使用的条目
+4. 本进程内修改用户信息后显式调用 invalidate；其他 worker 进程的缓存最多在 TTL 后更新
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """缓存中的用户信息（不含密码哈希）"""
+    id: int
+    username: Optional[str]
+    openid: Optional[str]
+    unionid: Optional[str]
+    nickname: Optional[str]
+    avatar_url: Optional[str]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            openid=user.openid,
+            unionid=user.unionid,
+            nickname=user.nickname,
+            avatar_url=user.avatar_url,
+            created_at=user.created_at,
+        )
+
+
+class UserCache:
+    """按用户ID缓存用户信息的 TTL + LRU 缓存"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+        # 同步依赖在线程池中执行，读写 OrderedDict 需要加锁（只保护内存操作，不包含数据库查询）
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        """获取缓存的用户，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or time.monotonic() >= entry[0]:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user: User) -> CachedUser:
+        """缓存用户信息并返回缓存条目"""
+        cached = CachedUser.from_user(user)
+        if self.max_size <= 0:
+            return cached
+        with self._lock:
+            self._entries[cached.id] = (time.monotonic() + self.ttl, cached)
+            self._entries.move_to_end(cached.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id: int) -> None:
+        """用户信息修改后移除缓存条目"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        """缓存大小和命中率（当前 worker 进程）"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
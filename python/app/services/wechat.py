@@ -7,14 +7,19 @@
 3. 生成 JWT token
 """
 
+import asyncio
+import time
 import httpx
 from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from app.config import settings
 from app.models.user import User
 from app.services.auth import AuthService
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.user_cache import user_cache
 
 
 class WechatLoginError(Exception):
@@ -28,8 +33,45 @@ class WechatLoginError(Exception):
 class WechatService:
     """微信小程序服务"""
     
-    # 微信登录接口
-    WECHAT_LOGIN_URL = "https://api.weixin.qq.com/sns/jscode2session"
+    # 微信登录接口（相对于 WECHAT_API_BASE_URL）
+    WECHAT_LOGIN_PATH = "/sns/jscode2session"
+
+    # 进程内共享的 HTTP 客户端（长连接复用，避免每次登录都重新进行 TCP + TLS 握手）
+    _http_client: Optional[httpx.AsyncClient] = None
+    # 限制同时进行中的微信接口请求数
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    # 微信接口熔断器：微信服务变慢或出错时快速失败，避免登录请求长时间占用 worker
+    breaker = CircuitBreaker(
+        name="wechat.code2session",
+        window=settings.WECHAT_BREAKER_WINDOW,
+        min_calls=settings.WECHAT_BREAKER_MIN_CALLS,
+        failure_rate=settings.WECHAT_BREAKER_FAILURE_RATE,
+        open_seconds=settings.WECHAT_BREAKER_OPEN_SECONDS,
+    )
+
+    @staticmethod
+    def get_http_client() -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端，首次使用时创建"""
+        if WechatService._http_client is None or WechatService._http_client.is_closed:
+            WechatService._http_client = httpx.AsyncClient(
+                base_url=settings.WECHAT_API_BASE_URL,
+                timeout=httpx.Timeout(settings.WECHAT_READ_TIMEOUT, connect=settings.WECHAT_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.WECHAT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.WECHAT_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            WechatService._semaphore = asyncio.Semaphore(settings.WECHAT_MAX_CONCURRENCY)
+        return WechatService._http_client
+
+    @staticmethod
+    async def close_http_client() -> None:
+        """关闭共享的 HTTP 客户端（应用关闭时调用）"""
+        if WechatService._http_client is not None:
+            await WechatService._http_client.aclose()
+            WechatService._http_client = None
+            WechatService._semaphore = None
     
     @staticmethod
     async def code2session(code: str) -> dict:
@@ -45,7 +87,7 @@ class WechatService:
             dict: 包含 openid, session_key, unionid(可选) 的字典
             
         Raises:
-            WechatLoginError: 微信接口返回错误时抛出
+            WechatLoginError: 微信接口返回错误、请求超时或网络错误时抛出
         """
         params = {
             "appid": settings.WECHAT_APPID,
@@ -54,9 +96,41 @@ class WechatService:
             "grant_type": "authorization_code"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(WechatService.WECHAT_LOGIN_URL, params=params)
+        try:
+            WechatService.breaker.before_call()
+        except CircuitOpenError:
+            raise WechatLoginError(errcode=-1, errmsg="微信服务暂时不可用，请稍后再试")
+
+        client = WechatService.get_http_client()
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(settings.WECHAT_TOTAL_TIMEOUT):
+                async with WechatService._semaphore:
+                    response = await client.get(WechatService.WECHAT_LOGIN_PATH, params=params)
+            response.raise_for_status()
             result = response.json()
+            if not isinstance(result, dict):
+                raise ValueError("微信接口返回的不是 JSON 对象")
+        except (httpx.TimeoutException, TimeoutError):
+            WechatService.breaker.record_failure(time.perf_counter() - started)
+            raise WechatLoginError(errcode=-1, errmsg="微信服务响应超时")
+        except (httpx.HTTPError, ValueError):
+            WechatService.breaker.record_failure(time.perf_counter() - started)
+            raise WechatLoginError(errcode=-1, errmsg="微信服务请求失败")
+        except asyncio.CancelledError:
+            # 请求被取消（如客户端断开）：没有调用结果，只归还熔断器的试探名额
+            WechatService.breaker.release()
+            raise
+        except BaseException:
+            # 其他异常同样必须结束本次调用，否则半开状态的试探名额永远不会归还
+            WechatService.breaker.record_failure(time.perf_counter() - started)
+            raise
+
+        # errcode = -1 表示微信系统繁忙，计入熔断失败；其他错误码（如 code 无效）是调用方的问题
+        if result.get("errcode") == -1:
+            WechatService.breaker.record_failure(time.perf_counter() - started)
+        else:
+            WechatService.breaker.record_success(time.perf_counter() - started)
         
         # 检查是否有错误
         if "errcode" in result and result["errcode"] != 0:
@@ -142,6 +216,7 @@ class WechatService:
             user.avatar_url = avatar_url
         
         db.commit()
+        user_cache.invalidate(user.id)
         db.refresh(user)
         return user
     
@@ -174,6 +249,29 @@ class WechatService:
         """
         # 1. 通过 code 换取 openid
         session_data = await WechatService.code2session(code)
+
+        # 2. 查找或创建用户  3. 生成 JWT token
+        return WechatService.login_with_session_data(db, session_data, nickname, avatar_url)
+
+    @staticmethod
+    def login_with_session_data(
+        db: Session,
+        session_data: dict,
+        nickname: Optional[str] = None,
+        avatar_url: Optional[str] = None
+    ) -> Tuple[User, str, bool]:
+        """
+        根据 code2session 的结果查找或创建用户，并生成 JWT token
+
+        Args:
+            db: 数据库会话
+            session_data: code2session 返回的数据
+            nickname: 微信昵称（可选）
+            avatar_url: 微信头像URL（可选）
+
+        Returns:
+            Tuple[User, str, bool]: (用户对象, JWT token, 是否为新用户)
+        """
         openid = session_data["openid"]
         unionid = session_data.get("unionid")
         
@@ -209,4 +307,41 @@ class WechatService:
             expires_delta=access_token_expires
         )
         
-        return user, access_token, is_new_user
\ No newline at end of file
+        return user, access_token, is_new_user
+
+
+class AsyncWechatService:
+    """
+    WechatService 的异步版本，供使用 AsyncSession 的 async def 路由调用
+
+    数据库部分复用 WechatService 的同步实现，通过 AsyncSession.run_sync 执行，底层 IO 由 asyncpg 异步完成
+    """
+
+    @staticmethod
+    async def login(
+        db: AsyncSession,
+        code: str,
+        nickname: Optional[str] = None,
+        avatar_url: Optional[str] = None
+    ) -> Tuple[User, str, bool]:
+        """
+        微信小程序登录，参见 WechatService.login
+
+        Raises:
+            WechatLoginError: 微信接口返回错误时抛出
+        """
+        session_data = await WechatService.code2session(code)
+        return await db.run_sync(
+            WechatService.login_with_session_data, session_data, nickname, avatar_url
+        )
+
+    @staticmethod
+    async def update_wechat_user(
+        db: AsyncSession,
+        user: User,
+        unionid: Optional[str] = None,
+        nickname: Optional[str] = None,
+        avatar_url: Optional[str] = None
+    ) -> User:
+        """更新微信用户信息，参见 WechatService.update_wechat_user"""
+        return await db.run_sync(WechatService.update_wechat_user, user, unionid, nickname, avatar_url)
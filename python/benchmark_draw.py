@@ -0,0 +1,163 @@
+"""
+抽取美食采样策略基准测试
+
+对比以下几种随机取美食的方式的延迟和分布均匀性：
+- legacy   : 旧实现，query.all() 取出全部候选后 random.choice
+- catalog  : 进程内美食目录快照采样
+- offset   : 数据库内 COUNT + OFFSET
+- id_probe : 数据库内主键区间随机探测
+
+用法:
+    python benchmark_draw.py                       # 使用 .env 中配置的数据库
+    python benchmark_draw.py --synthetic 100000    # 使用内存 SQLite 生成 10 万条模拟美食
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from decimal import Decimal
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, SessionLocal
+from app.models import Food
+from app.services.catalog import food_catalog
+from app.services.draw import DrawService
+
+CATEGORIES = ["中餐", "西餐", "日料", "韩餐", "小吃", "甜点", "饮品"]
+
+# 压测使用的筛选条件组合
+FILTER_CASES = [
+    {},
+    {"meal_type": 2},
+    {"meal_type": 3, "category": "中餐"},
+    {"min_price": Decimal("20"), "max_price": Decimal("60")},
+    {"meal_type": 1, "category": "小吃", "max_price": Decimal("30")},
+]
+
+
+def legacy_random_food(db, meal_type=None, min_price=None, max_price=None, category=None):
+    """旧实现：取出全部候选 ORM 对象后随机选择"""
+    query = DrawService._filter_foods(db.query(Food), meal_type, min_price, max_price, category)
+    foods = query.all()
+    if not foods:
+        return None
+    return random.choice(foods)
+
+
+def create_synthetic_session(count: int):
+    """创建内存 SQLite 并写入模拟美食数据"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.bulk_insert_mappings(Food, [
+        {
+            "name": f"模拟美食{i}",
+            "category": random.choice(CATEGORIES),
+            "meal_type": random.randint(1, 4),
+            "price": Decimal(random.randint(500, 20000)) / 100,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    return db
+
+
+def run_strategy(db, name: str, iterations: int) -> list:
+    """执行指定策略，返回每次调用的耗时（毫秒）"""
+    if name == "legacy":
+        sample = legacy_random_food
+    else:
+        settings.DRAW_SAMPLING = name
+        sample = DrawService.get_random_food
+
+    timings = []
+    for i in range(iterations):
+        filters = FILTER_CASES[i % len(FILTER_CASES)]
+        start = time.perf_counter()
+        sample(db, **filters)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def check_uniformity(db, name: str, draws: int) -> float:
+    """
+    在固定筛选条件下统计每个候选被抽中的次数，返回卡方统计量与自由度之比
+
+    比值接近 1 说明分布与均匀分布一致
+    """
+    filters = FILTER_CASES[2]
+    if name == "legacy":
+        sample = legacy_random_food
+    else:
+        settings.DRAW_SAMPLING = name
+        sample = DrawService.get_random_food
+
+    candidates = DrawService._filter_foods(db.query(Food.id), **filters).count()
+    if candidates < 2:
+        return float("nan")
+    counter = Counter(sample(db, **filters).id for _ in range(draws))
+    expected = draws / candidates
+    chi2 = sum((hits - expected) ** 2 / expected for hits in counter.values())
+    # 一次都没抽中的候选，每个贡献 (0 - expected)^2 / expected = expected
+    chi2 += (candidates - len(counter)) * expected
+    return chi2 / (candidates - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抽取美食采样策略基准测试")
+    parser.add_argument("--synthetic", type=int, default=0, help="使用内存 SQLite 生成指定数量的模拟美食")
+    parser.add_argument("--iterations", type=int, default=500, help="每种策略的调用次数")
+    parser.add_argument("--uniformity-draws", type=int, default=0, help="均匀性检验的抽取次数（0 表示跳过）")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("抽取美食采样策略基准测试")
+    print("=" * 60)
+
+    if args.synthetic:
+        print(f"数据源: 内存 SQLite，模拟美食 {args.synthetic} 条")
+        db = create_synthetic_session(args.synthetic)
+    else:
+        print(f"数据源: {settings.DATABASE_URL[:50]}...")
+        db = SessionLocal()
+
+    try:
+        total = db.query(Food).count()
+        print(f"美食总数: {total}")
+        if total == 0:
+            print("[ERROR] foods 表为空，无法测试")
+            return
+
+        # 预热美食目录快照，避免首次加载计入 catalog 策略的耗时
+        food_catalog.invalidate()
+        food_catalog.get_snapshot(db)
+        print()
+
+        print(f"{'策略':<10}{'平均(ms)':>12}{'P50(ms)':>12}{'P99(ms)':>12}")
+        print("-" * 46)
+        for name in ["legacy", "catalog", "offset", "id_probe"]:
+            timings = sorted(run_strategy(db, name, args.iterations))
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{name:<10}{statistics.mean(timings):>12.3f}{statistics.median(timings):>12.3f}{p99:>12.3f}")
+
+        if args.uniformity_draws:
+            print()
+            print(f"均匀性检验（筛选条件 {FILTER_CASES[2]}，抽取 {args.uniformity_draws} 次，卡方/自由度 ≈ 1 为均匀）")
+            for name in ["legacy", "catalog", "offset", "id_probe"]:
+                print(f"  {name:<10}{check_uniformity(db, name, args.uniformity_draws):.3f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+微信登录 code2session 压测
+
+对模拟微信服务（fake_wechat_server.py）并发调用 WechatService.code2session，
+统计延迟分布、失败原因以及熔断器状态，用于验证微信接口变慢或出错时登录仍能在有限时间内返回。
+
+用法:
+    python fake_wechat_server.py --port 9000 --delay 0.05 --error-rate 0.6 &
+    python benchmark_login.py --base-url http://127.0.0.1:9000 --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+
+
+async def run(total: int, concurrency: int) -> None:
+    from app.services.wechat import WechatLoginError, WechatService
+
+    timings = []
+    outcomes = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await WechatService.code2session(uuid.uuid4().hex)
+                outcomes["成功"] += 1
+            except WechatLoginError as e:
+                outcomes[e.errmsg] += 1
+            timings.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    await WechatService.close_http_client()
+
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"总耗时: {elapsed:.2f}s  吞吐: {total / elapsed:.1f} req/s")
+    print(f"延迟(ms): 平均 {statistics.mean(timings):.1f}  P50 {statistics.median(timings):.1f}  "
+          f"P99 {p99:.1f}  最大 {timings[-1]:.1f}")
+    print()
+    print("结果分布:")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<24}{count:>8}")
+    print()
+    print("熔断器指标:")
+    for key, value in WechatService.breaker.metrics().items():
+        print(f"  {key:<20}{value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微信登录 code2session 压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9000", help="模拟微信服务地址")
+    parser.add_argument("--requests", type=int, default=500, help="总请求数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    args = parser.parse_args()
+
+    # 必须在导入 WechatService 之前设置，共享客户端按此地址创建
+    settings.WECHAT_API_BASE_URL = args.base_url
+
+    print("=" * 60)
+    print("微信登录 code2session 压测")
+    print("=" * 60)
+    print(f"目标: {args.base_url}  请求数: {args.requests}  并发: {args.concurrency}")
+    print(f"总超时: {settings.WECHAT_TOTAL_TIMEOUT}s  熔断阈值: 最近 {settings.WECHAT_BREAKER_WINDOW} 次失败率 "
+          f"≥ {settings.WECHAT_BREAKER_FAILURE_RATE}，熔断 {settings.WECHAT_BREAKER_OPEN_SECONDS}s")
+    print()
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+密码登录吞吐基准测试
+
+在进程内通过 ASGI 直接调用 /api/user/login，对比不同 PASSWORD_HASH_WORKERS 下的登录吞吐和延迟，
+同时持续请求 /health，观察登录高峰期间其他请求的响应延迟（事件循环是否被哈希计算拖慢）。
+- workers = 0 : 在线程池中计算哈希（与原先同步路由在线程池中计算等价）
+- workers > 0 : 在进程池中计算哈希
+
+用法:
+    python benchmark_password.py                                  # 使用 .env 中配置的数据库，结束后清理测试用户
+    python benchmark_password.py --requests 200 --concurrency 50 --workers 0 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import User
+from app.services.auth import AuthService
+from app.services.password_hasher import password_hasher
+
+PASSWORD = "benchmark-password"
+
+
+def percentile(timings: list, p: float) -> float:
+    return timings[min(len(timings) - 1, int(len(timings) * p))]
+
+
+async def run(username: str, total: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        login_timings = []
+        probe_timings = []
+        failures = 0
+        done = asyncio.Event()
+
+        async def one_login() -> None:
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/user/login", json={"username": username, "password": PASSWORD})
+                login_timings.append((time.perf_counter() - start) * 1000)
+                if response.json()["code"] != 0:
+                    failures += 1
+
+        async def probe() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                probe_timings.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        # 预热进程池（每个子进程都要启动并导入模块），避免启动时间计入结果
+        await asyncio.gather(*(
+            client.post("/api/user/login", json={"username": username, "password": PASSWORD})
+            for _ in range(max(1, password_hasher.workers) * 2)
+        ))
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    login_timings.sort()
+    probe_timings.sort()
+    return {
+        "throughput": total / elapsed,
+        "login_p50": statistics.median(login_timings),
+        "login_p99": percentile(login_timings, 0.99),
+        "probe_p99": percentile(probe_timings, 0.99) if probe_timings else float("nan"),
+        "failures": failures,
+    }
+
+
+async def run_all(username: str, args) -> None:
+    # 所有配置在同一个事件循环中执行，异步连接池中的连接与事件循环绑定
+    for workers in args.workers:
+        password_hasher.shutdown()
+        password_hasher.workers = workers
+        result = await run(username, args.requests, args.concurrency)
+        print(f"{workers:<10}{result['throughput']:>14.1f}{result['login_p50']:>12.1f}"
+              f"{result['login_p99']:>12.1f}{result['probe_p99']:>18.1f}{result['failures']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="密码登录吞吐基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每种配置的登录请求数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4], help="要对比的哈希进程数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("密码登录吞吐基准测试")
+    print("=" * 60)
+    print(f"数据源: {settings.DATABASE_URL[:50]}...")
+    print(f"迭代次数: {settings.PASSWORD_HASH_ROUNDS}  CPU: {os.cpu_count()}  "
+          f"请求数: {args.requests}  并发: {args.concurrency}")
+    print()
+
+    db = SessionLocal()
+    username = f"bench_pw_{uuid.uuid4().hex[:12]}"
+    db.add(User(username=username, hashed_password=AuthService.get_password_hash(PASSWORD)))
+    db.commit()
+
+    try:
+        print(f"{'workers':<10}{'吞吐(req/s)':>14}{'P50(ms)':>12}{'P99(ms)':>12}{'/health P99(ms)':>18}{'失败':>8}")
+        print("-" * 74)
+        asyncio.run(run_all(username, args))
+    finally:
+        password_hasher.shutdown()
+        db.query(User).filter(User.username == username).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+        print("\n[OK] 测试用户已清理")
+
+
+if __name__ == "__main__":
+    main()
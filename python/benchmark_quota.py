@@ -0,0 +1,161 @@
+"""
+每日抽取次数查询基准测试
+
+对比几种"今日已抽取次数"查询写法在单个用户拥有大量历史记录时的延迟：
+- func_date : 最初写法，func.date(drawn_at) = 今天（无法使用 drawn_at 索引）
+- range     : drawn_at >= 今日零点 AND drawn_at < 明日零点（命中 (user_id, drawn_at) 索引）
+- quota     : 当前写法，每日计数表 user_daily_quota 的单行主键查询
+
+用法:
+    python benchmark_quota.py                          # 在 .env 配置的数据库中创建临时用户测试，结束后清理
+    python benchmark_quota.py --synthetic              # 使用内存 SQLite
+    python benchmark_quota.py --records 50000 --users 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, SessionLocal
+from app.models import DrawRecord, Food, User, UserDailyQuota
+from app.services.draw import DrawService
+
+
+def legacy_today_draw_count(db, user_id: int) -> int:
+    """最初写法：对 drawn_at 套用 func.date"""
+    return db.query(DrawRecord).filter(
+        DrawRecord.user_id == user_id,
+        func.date(DrawRecord.drawn_at) == date.today()
+    ).count()
+
+
+def get_today_range() -> tuple[datetime, datetime]:
+    """今天的时间范围 [今日零点, 明日零点)，使用服务器本地时区"""
+    start = datetime.combine(date.today(), datetime.min.time()).astimezone()
+    return start, start + timedelta(days=1)
+
+
+def range_today_draw_count(db, user_id: int) -> int:
+    """半开区间写法"""
+    start, end = get_today_range()
+    return db.query(func.count(DrawRecord.id)).filter(
+        DrawRecord.user_id == user_id,
+        DrawRecord.drawn_at >= start,
+        DrawRecord.drawn_at < end
+    ).scalar()
+
+
+def seed_records(db, users: int, records: int) -> list:
+    """创建测试用户，每个用户写入 records 条分布在过去一年内的抽取记录"""
+    food = db.query(Food).first()
+    if food is None:
+        food = Food(name="基准测试美食", category="中餐")
+        db.add(food)
+        db.commit()
+
+    user_ids = []
+    now = datetime.now().astimezone()
+    for _ in range(users):
+        user = User(username=f"bench_quota_{uuid.uuid4().hex[:12]}")
+        db.add(user)
+        db.commit()
+        user_ids.append(user.id)
+
+        db.bulk_insert_mappings(DrawRecord, [
+            {
+                "user_id": user.id,
+                "food_id": food.id,
+                "drawn_at": now - timedelta(seconds=random.randint(0, 365 * 24 * 3600)),
+            }
+            for _ in range(records)
+        ])
+        db.commit()
+
+        # 与迁移中的回填逻辑一致：写入今日计数行
+        db.add(UserDailyQuota(user_id=user.id, day=date.today(), used=range_today_draw_count(db, user.id)))
+        db.commit()
+    return user_ids
+
+
+def cleanup(db, user_ids: list) -> None:
+    db.query(UserDailyQuota).filter(UserDailyQuota.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.query(DrawRecord).filter(DrawRecord.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def measure(db, fn, user_ids: list, iterations: int) -> list:
+    timings = []
+    for i in range(iterations):
+        user_id = user_ids[i % len(user_ids)]
+        start = time.perf_counter()
+        fn(db, user_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日抽取次数查询基准测试")
+    parser.add_argument("--synthetic", action="store_true", help="使用内存 SQLite 代替配置的数据库")
+    parser.add_argument("--users", type=int, default=5, help="测试用户数")
+    parser.add_argument("--records", type=int, default=10000, help="每个用户的历史抽取记录数")
+    parser.add_argument("--iterations", type=int, default=200, help="每种写法的查询次数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("每日抽取次数查询基准测试")
+    print("=" * 60)
+
+    if args.synthetic:
+        print("数据源: 内存 SQLite")
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+    else:
+        print(f"数据源: {settings.DATABASE_URL[:50]}...")
+        db = SessionLocal()
+
+    print(f"写入测试数据: {args.users} 个用户 × {args.records} 条记录...")
+    user_ids = seed_records(db, args.users, args.records)
+
+    try:
+        # 各写法的结果必须一致
+        for user_id in user_ids:
+            legacy = legacy_today_draw_count(db, user_id)
+            ranged = range_today_draw_count(db, user_id)
+            current = DrawService.get_today_draw_count(db, user_id)
+            if not legacy == ranged == current:
+                print(f"[WARNING] 用户 {user_id} 结果不一致: func_date={legacy}, range={ranged}, quota={current}")
+
+        print()
+        print(f"{'写法':<12}{'平均(ms)':>12}{'P50(ms)':>12}{'P99(ms)':>12}")
+        print("-" * 48)
+        for name, fn in [
+            ("func_date", legacy_today_draw_count),
+            ("range", range_today_draw_count),
+            ("quota", DrawService.get_today_draw_count),
+        ]:
+            timings = measure(db, fn, user_ids, args.iterations)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{name:<12}{statistics.mean(timings):>12.3f}{statistics.median(timings):>12.3f}{p99:>12.3f}")
+    finally:
+        if not args.synthetic:
+            cleanup(db, user_ids)
+            print("\n[OK] 测试数据已清理")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+美食搜索基准测试
+
+对比两种按关键词搜索美食的方式：
+- like  : 数据库内 foods.name LIKE '%关键词%'（无法使用索引，只支持菜名子串）
+- index : 当前实现，进程内 n-gram 倒排索引（支持菜名子串、全拼和拼音首字母）
+
+用法:
+    python benchmark_search.py                     # 使用 .env 中配置的数据库
+    python benchmark_search.py --iterations 5000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Food
+from app.services.catalog import food_catalog
+from app.services.food_search import food_search
+
+# 压测使用的关键词：菜名子串、全拼、拼音首字母
+QUERIES = ["烧肉", "牛排", "拉面", "hongshao", "niurou", "hsr", "mpdf", "lm"]
+
+
+def like_search(db, query: str, limit: int) -> list:
+    return db.query(Food).filter(Food.name.like(f"%{query}%")).order_by(Food.id).limit(limit).all()
+
+
+def index_search(db, query: str, limit: int) -> list:
+    return food_search.search(food_catalog.get_snapshot(db), query, limit)
+
+
+def measure(db, fn, iterations: int, limit: int) -> list:
+    timings = []
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        fn(db, query, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="美食搜索基准测试")
+    parser.add_argument("--iterations", type=int, default=2000, help="每种方式的搜索次数")
+    parser.add_argument("--limit", type=int, default=20, help="每次搜索返回的最大条数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("美食搜索基准测试")
+    print("=" * 60)
+    print(f"数据源: {settings.DATABASE_URL[:50]}...")
+
+    db = SessionLocal()
+    try:
+        # 预热美食目录快照和搜索索引，避免首次构建计入耗时
+        food_catalog.invalidate()
+        start = time.perf_counter()
+        food_search.get_index(food_catalog.get_snapshot(db))
+        print(f"索引构建耗时: {(time.perf_counter() - start) * 1000:.1f} ms，{food_search.metrics()}")
+
+        print()
+        print(f"{'关键词':<12}{'like':>8}{'index':>8}")
+        for query in QUERIES:
+            print(f"{query:<12}{len(like_search(db, query, args.limit)):>8}{len(index_search(db, query, args.limit)):>8}")
+
+        print()
+        print(f"{'方式':<10}{'平均(ms)':>12}{'P50(ms)':>12}{'P99(ms)':>12}")
+        print("-" * 46)
+        for name, fn in [("like", like_search), ("index", index_search)]:
+            timings = measure(db, fn, args.iterations, args.limit)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{name:<10}{statistics.mean(timings):>12.3f}{statistics.median(timings):>12.3f}{p99:>12.3f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
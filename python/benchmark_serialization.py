@@ -0,0 +1,116 @@
+"""
+响应序列化基准测试
+
+对比抽取记录接口返回 limit 条美食时几种序列化方式的耗时：
+- legacy  : 旧实现，FoodResponse.model_validate().model_dump() 后由 JSONResponse 经 jsonable_encoder 编码
+- orjson  : 同样先转成字典，改用 orjson 编码
+- payload : 当前实现，拼接美食目录中按 (美食ID, 快照版本) 缓存的 JSON 片段
+
+用法:
+    python benchmark_serialization.py                  # 使用 .env 中配置的数据库
+    python benchmark_serialization.py --limit 50 --iterations 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Food
+from app.schemas.food import FoodResponse
+from app.schemas.response import ORJSONResponse
+from app.services.catalog import food_catalog
+
+
+# 固定时间，保证各方式输出的字节可以直接比较
+DRAWN_AT = datetime.now().astimezone().isoformat()
+
+
+def build_body(foods: list, encode_food) -> dict:
+    """与抽取记录接口相同结构的响应体"""
+    return {
+        "code": 0,
+        "msg": "success",
+        "data": {
+            "records": [
+                {"id": index, "food": encode_food(food), "drawn_at": DRAWN_AT}
+                for index, food in enumerate(foods)
+            ],
+            "next_cursor": None,
+        },
+    }
+
+
+def legacy(foods: list) -> bytes:
+    body = build_body(foods, lambda food: FoodResponse.model_validate(food).model_dump())
+    return JSONResponse(jsonable_encoder(body)).body
+
+
+def orjson_dict(foods: list) -> bytes:
+    body = build_body(foods, lambda food: FoodResponse.model_validate(food).model_dump())
+    return ORJSONResponse(body).body
+
+
+def payload(foods: list) -> bytes:
+    return ORJSONResponse(build_body(foods, food_catalog.food_payload)).body
+
+
+def measure(fn, foods: list, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(foods)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化基准测试")
+    parser.add_argument("--limit", type=int, default=20, help="每个响应包含的美食数量")
+    parser.add_argument("--iterations", type=int, default=1000, help="每种方式的序列化次数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("响应序列化基准测试")
+    print("=" * 60)
+    print(f"数据源: {settings.DATABASE_URL[:50]}...")
+
+    db = SessionLocal()
+    try:
+        food_catalog.invalidate()
+        food_catalog.get_snapshot(db)
+        foods = db.query(Food).order_by(Food.id).limit(args.limit).all()
+        if not foods:
+            print("[ERROR] foods 表为空，无法测试")
+            return
+        print(f"每个响应美食数: {len(foods)}")
+
+        # 各方式输出的字节必须一致
+        expected = legacy(foods)
+        for name, fn in [("orjson", orjson_dict), ("payload", payload)]:
+            if fn(foods) != expected:
+                print(f"[WARNING] {name} 输出与 legacy 不一致")
+
+        print()
+        print(f"{'方式':<10}{'平均(ms)':>12}{'P50(ms)':>12}{'P99(ms)':>12}")
+        print("-" * 46)
+        for name, fn in [("legacy", legacy), ("orjson", orjson_dict), ("payload", payload)]:
+            timings = measure(fn, foods, args.iterations)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{name:<10}{statistics.mean(timings):>12.3f}{statistics.median(timings):>12.3f}{p99:>12.3f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+本地模拟微信 code2session 接口
+
+用于在无网络环境下压测微信登录，可注入延迟、系统繁忙错误和超时：
+    python fake_wechat_server.py --port 9000 --delay 0.05 --error-rate 0.1 --timeout-rate 0.05
+
+后端配置 WECHAT_API_BASE_URL=http://127.0.0.1:9000 即可把登录请求指向本服务。
+运行中可通过 POST /_control 调整注入参数（JSON: delay / error_rate / timeout_rate / hang_seconds），
+GET /_control 查看当前参数和请求计数。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+
+from fastapi import Body, FastAPI
+
+app = FastAPI(title="Fake WeChat API")
+
+state = {
+    "delay": 0.0,  # 每个请求的固定延迟（秒）
+    "jitter": 0.0,  # 在固定延迟上叠加的随机延迟上限（秒）
+    "error_rate": 0.0,  # 返回 errcode=-1（系统繁忙）的比例
+    "timeout_rate": 0.0,  # 挂起 hang_seconds 秒模拟超时的比例
+    "hang_seconds": 30.0,
+    "requests": 0,
+}
+
+
+@app.get("/sns/jscode2session")
+async def jscode2session(js_code: str = "", appid: str = "", secret: str = "", grant_type: str = ""):
+    state["requests"] += 1
+    await asyncio.sleep(state["delay"] + random.uniform(0, state["jitter"]))
+
+    roll = random.random()
+    if roll < state["timeout_rate"]:
+        await asyncio.sleep(state["hang_seconds"])
+    elif roll < state["timeout_rate"] + state["error_rate"]:
+        return {"errcode": -1, "errmsg": "system error"}
+
+    if not js_code or js_code.startswith("invalid"):
+        return {"errcode": 40029, "errmsg": "invalid code"}
+
+    # 同一个 code 总是映射到同一个 openid，便于复现登录同一用户
+    openid = "fake_" + hashlib.md5(js_code.encode("utf-8")).hexdigest()[:20]
+    return {"openid": openid, "session_key": "fake_session_key"}
+
+
+@app.get("/_control")
+async def get_control():
+    return state
+
+
+@app.post("/_control")
+async def set_control(updates: dict = Body(...)):
+    for key, value in updates.items():
+        if key in state and key != "requests":
+            state[key] = float(value)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟微信 code2session 接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回系统繁忙错误的比例")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="挂起不响应的比例")
+    parser.add_argument("--hang-seconds", type=float, default=30.0, help="模拟超时时挂起的秒数")
+    args = parser.parse_args()
+
+    state.update(
+        delay=args.delay,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
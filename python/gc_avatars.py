@@ -0,0 +1,191 @@
+"""
+孤立头像清理工具
+
+每次上传头像都会写入新文件（以及缩略图），旧头像文件不会被删除。本工具扫描头像目录，删除不再被引用的文件：
+1. 按分片目录逐个扫描（先扫描未迁移的顶层平铺文件），不一次性列出整个目录
+2. 只处理修改时间早于宽限期（--grace-hours）的文件，避免误删刚上传、尚未写入数据库的头像
+3. 头像文件名以用户ID开头，按用户ID分批查询 users 表（主键查询，每批一个短事务），
+   用户当前 avatar_url 对应的原图及其缩略图保留，其余视为孤立文件；
+   文件名不符合头像命名规则的文件不处理，超过宽限期的上传临时文件直接删除
+4. 每处理完一个分片目录记录一次进度，中断后再次运行从上次的位置继续；--max-files-per-second 限制扫描速度
+5. 结束时报告删除的文件数和回收的空间
+
+用法:
+    python gc_avatars.py --dry-run
+    python gc_avatars.py --grace-hours 24 --max-files-per-second 2000
+    python gc_avatars.py --restart                      # 忽略上次进度，从头扫描
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.models import User
+from app.services.avatar import AVATAR_UPLOAD_DIR, AVATAR_URL_PREFIX, TEMP_SUFFIX, avatar_stem
+
+# 头像文件名主干：{用户ID}_{8位随机串}
+STEM_RE = re.compile(r"^(?P<user_id>\d+)_[0-9a-f]{8}$")
+
+SHARD_RE = re.compile(r"^[0-9a-f]{2}$")
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(AVATAR_UPLOAD_DIR), ".avatar_gc_checkpoint.json")
+
+
+def iter_shards() -> Iterator[str]:
+    """按固定顺序列出要扫描的目录（相对路径）：顶层平铺文件所在的 "" 之后是各分片目录"""
+    yield ""
+    for first in sorted(os.listdir(AVATAR_UPLOAD_DIR)):
+        first_path = os.path.join(AVATAR_UPLOAD_DIR, first)
+        if not SHARD_RE.match(first) or not os.path.isdir(first_path):
+            continue
+        for second in sorted(os.listdir(first_path)):
+            if SHARD_RE.match(second) and os.path.isdir(os.path.join(first_path, second)):
+                yield f"{first}/{second}"
+
+
+def load_checkpoint(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"last_shard": None, "scanned": 0, "deleted": 0, "reclaimed_bytes": 0}
+
+
+def save_checkpoint(path: str, state: Dict) -> None:
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+
+def referenced_stems(user_ids: List[int]) -> set:
+    """查询这些用户当前头像对应的文件名主干"""
+    db = SessionLocal()
+    try:
+        rows = db.query(User.avatar_url).filter(
+            User.id.in_(user_ids),
+            User.avatar_url.like(f"{AVATAR_URL_PREFIX}%"),
+        ).all()
+    finally:
+        db.close()
+    return {avatar_stem(avatar_url.rsplit("/", 1)[-1]) for (avatar_url,) in rows}
+
+
+def collect_orphans(candidates: List[Tuple[str, str, int]]) -> List[Tuple[str, int]]:
+    """candidates: (路径, 文件名主干, 大小)，返回其中不再被引用的 (路径, 大小)"""
+    if not candidates:
+        return []
+    user_ids = sorted({int(STEM_RE.match(stem).group("user_id")) for _, stem, _ in candidates})
+    keep = referenced_stems(user_ids)
+    return [(path, size) for path, stem, size in candidates if stem not in keep]
+
+
+def remove_files(files: List[Tuple[str, int]], dry_run: bool) -> Tuple[int, int]:
+    deleted = 0
+    reclaimed = 0
+    for path, size in files:
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+        deleted += 1
+        reclaimed += size
+    return deleted, reclaimed
+
+
+def sweep(args) -> None:
+    state = {"last_shard": None, "scanned": 0, "deleted": 0, "reclaimed_bytes": 0}
+    if not args.restart and not args.dry_run:
+        state = load_checkpoint(args.checkpoint)
+        if state["last_shard"] is not None:
+            print(f"从上次的进度继续（已完成到分片 {state['last_shard'] or '顶层'}）")
+
+    cutoff = time.time() - args.grace_hours * 3600
+    min_interval = 1.0 / args.max_files_per_second if args.max_files_per_second > 0 else 0.0
+    started = time.monotonic()
+    scanned_this_run = 0
+
+    for shard in iter_shards():
+        if state["last_shard"] is not None and shard <= state["last_shard"]:
+            continue
+
+        directory = os.path.join(AVATAR_UPLOAD_DIR, shard)
+        candidates: List[Tuple[str, str, int]] = []
+        expired_temp: List[Tuple[str, int]] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat_result = entry.stat()
+                state["scanned"] += 1
+                scanned_this_run += 1
+                if stat_result.st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith(TEMP_SUFFIX):
+                    expired_temp.append((entry.path, stat_result.st_size))
+                    continue
+                stem = avatar_stem(entry.name)
+                if STEM_RE.match(stem):
+                    candidates.append((entry.path, stem, stat_result.st_size))
+
+                if len(candidates) >= args.batch_size:
+                    deleted, reclaimed = remove_files(collect_orphans(candidates), args.dry_run)
+                    state["deleted"] += deleted
+                    state["reclaimed_bytes"] += reclaimed
+                    candidates = []
+
+                # 限速：扫描速度不超过 max_files_per_second
+                if min_interval:
+                    ahead = scanned_this_run * min_interval - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        for files in (collect_orphans(candidates), expired_temp):
+            deleted, reclaimed = remove_files(files, args.dry_run)
+            state["deleted"] += deleted
+            state["reclaimed_bytes"] += reclaimed
+
+        state["last_shard"] = shard
+        if not args.dry_run:
+            save_checkpoint(args.checkpoint, state)
+
+    action = "可删除" if args.dry_run else "已删除"
+    print(f"扫描文件: {state['scanned']}")
+    print(f"{action}孤立文件: {state['deleted']}")
+    print(f"{'可回收' if args.dry_run else '已回收'}空间: {state['reclaimed_bytes'] / 1024 / 1024:.2f} MB "
+          f"({state['reclaimed_bytes']} 字节)")
+
+    # 全部扫描完成，清除进度，下次从头开始
+    if not args.dry_run and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="孤立头像清理工具")
+    parser.add_argument("--grace-hours", type=float, default=24, help="只清理修改时间早于该小时数的文件")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批查询数据库的文件数")
+    parser.add_argument("--max-files-per-second", type=float, default=0, help="每秒最多扫描的文件数（0 表示不限速）")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="进度文件路径")
+    parser.add_argument("--restart", action="store_true", help="忽略上次的进度，从头扫描")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不删除文件")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("孤立头像清理")
+    print("=" * 60)
+    print(f"头像目录: {AVATAR_UPLOAD_DIR}  宽限期: {args.grace_hours} 小时")
+    print()
+
+    sweep(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import dashscope
 from dashscope import ImageSynthesis
 import psycopg2
 
+from app.imaging import get_resample_method
+
 # ===================== 基本配置 =====================
 
 # DashScope API 地址（北京地域）
@@ -104,14 +106,6 @@ def build_prompt(food: dict) -> str:
     return prompt
 
 
-def get_resample_method():
-    """兼容 Pillow 新旧版本的 LANCZOS 重采样常量。"""
-    try:
-        return Image.Resampling.LANCZOS  # Pillow >= 10
-    except AttributeError:
-        return Image.LANCZOS            # Pillow < 10
-
-
 def build_public_url(filename: str) -> str:
     """
     根据 BASE_URL 和 STATIC_URL_PREFIX 构造公网可访问的图片 URL。
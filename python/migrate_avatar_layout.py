@@ -0,0 +1,123 @@
+"""
+头像目录分片迁移工具
+
+把 static/avatars 下平铺存放的头像移动到按哈希分片的子目录（如 3f/a2/22_06b423ca.jpg），
+再分批把 users.avatar_url 中的平铺 URL 改写为分片 URL：
+1. 先移动文件：迁移期间旧 URL 由 AvatarStaticFiles 回退到分片目录，始终可以访问
+2. 再改写 URL：按用户ID分批（keyset）读取和更新，每批单独提交，不持有长事务；
+   只有 URL 未被并发修改、且分片文件已存在时才改写
+3. 可重复执行，中断后重新运行会从未完成的部分继续
+
+用法:
+    python migrate_avatar_layout.py --dry-run        # 只统计，不修改
+    python migrate_avatar_layout.py --batch-size 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加项目根目录到 sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, bindparam, update
+
+from app.database import SessionLocal
+from app.models import User
+from app.services.avatar import AVATAR_UPLOAD_DIR, AVATAR_URL_PREFIX, TEMP_SUFFIX, sharded_path
+
+users_table = User.__table__
+
+
+def move_files(dry_run: bool) -> None:
+    """逐个移动上传目录顶层的头像文件到分片目录"""
+    moved = 0
+    moved_bytes = 0
+    with os.scandir(AVATAR_UPLOAD_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.startswith(".") or entry.name.endswith(TEMP_SUFFIX):
+                continue
+            target = os.path.join(AVATAR_UPLOAD_DIR, sharded_path(entry.name))
+            size = entry.stat().st_size
+            if not dry_run:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(entry.path, target)
+            moved += 1
+            moved_bytes += size
+            if moved % 1000 == 0:
+                print(f"  已移动 {moved} 个文件...")
+    print(f"[文件] {'需要移动' if dry_run else '已移动'} {moved} 个文件，共 {moved_bytes / 1024 / 1024:.1f} MB")
+
+
+def rewrite_urls(batch_size: int, pause: float, dry_run: bool) -> None:
+    """分批把 users.avatar_url 中的平铺 URL 改写为分片 URL"""
+    statement = (
+        update(users_table)
+        .where(and_(
+            users_table.c.id == bindparam("b_id"),
+            users_table.c.avatar_url == bindparam("b_old"),
+        ))
+        .values(avatar_url=bindparam("b_new"))
+    )
+
+    last_id = 0
+    rewritten = 0
+    skipped = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.query(User.id, User.avatar_url).filter(
+                User.id > last_id,
+                User.avatar_url.like(f"{AVATAR_URL_PREFIX}%"),
+                ~User.avatar_url.like(f"{AVATAR_URL_PREFIX}%/%"),
+            ).order_by(User.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates = []
+            for user_id, avatar_url in rows:
+                relative_path = sharded_path(avatar_url[len(AVATAR_URL_PREFIX):])
+                if not dry_run and not os.path.exists(os.path.join(AVATAR_UPLOAD_DIR, relative_path)):
+                    # 文件不存在（已被删除或尚未移动），保留原 URL
+                    skipped += 1
+                    continue
+                updates.append({
+                    "b_id": user_id,
+                    "b_old": avatar_url,
+                    "b_new": f"{AVATAR_URL_PREFIX}{relative_path}",
+                })
+
+            if updates and not dry_run:
+                db.execute(statement, updates)
+                db.commit()
+            rewritten += len(updates)
+            print(f"  已处理到用户 {last_id}，{'需要改写' if dry_run else '已改写'} {rewritten} 条")
+        finally:
+            db.close()
+        if pause:
+            time.sleep(pause)
+
+    print(f"[URL] {'需要改写' if dry_run else '已改写'} {rewritten} 条，文件缺失跳过 {skipped} 条")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="头像目录分片迁移工具")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批改写的用户数")
+    parser.add_argument("--pause", type=float, default=0.0, help="每批之间暂停的秒数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不移动文件也不修改数据库")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("头像目录分片迁移")
+    print("=" * 60)
+    print(f"头像目录: {AVATAR_UPLOAD_DIR}")
+    print()
+
+    move_files(args.dry_run)
+    rewrite_urls(args.batch_size, args.pause, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()